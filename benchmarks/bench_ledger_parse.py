@@ -0,0 +1,118 @@
+"""Benchmark parsing the embed ledger: old parser vs. parse_embed.
+
+Usage: python benchmarks/bench_ledger_parse.py [sizes...]   (default: 25 250 2500)
+
+Each run renders N keys in the ledger field format into one embed and times
+the old positional extract_keys_from_embed against parse_embed. The keys
+the old parser got wrong are counted too: its "Used" in status_line
+check turns Expired keys into Unused ones, and reading lines by position
+drops the HWID of keys without an Expires line.
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+
+from embeds import _ledger_field
+from keyrecord import KeyRecord, KeyStatus
+from ledgerparser import parse_embed, parse_message
+
+GUILD_ID = 1
+
+
+def extract_keys_from_embed(embed):
+    """The pre-parse_embed parser from main.py"""
+    keys = {}
+    if embed and embed.fields:
+        for field in embed.fields:
+            key_name = field.name.strip('`')
+            lines = field.value.split('\n')
+            user_line = lines[0]
+            status_line = lines[1]
+            try:
+                user_id = int(user_line.split('<@')[1].split('>')[0])
+                used = "Used" in status_line
+                duration_text = "Unknown"
+                expires_at = None
+                if len(lines) >= 3:
+                    duration_line = lines[2]
+                    if "Duration:" in duration_line:
+                        duration_text = duration_line.split("Duration: ")[1]
+                    if len(lines) >= 4:
+                        expires_line = lines[3]
+                        if "Expires:" in expires_line:
+                            try:
+                                expires_str = expires_line.split("Expires: ")[1]
+                                expires_at = datetime.fromisoformat(expires_str).isoformat()
+                            except:
+                                pass
+                hwid = None
+                if len(lines) >= 5:
+                    hwid_line = lines[4]
+                    if "HWID:" in hwid_line:
+                        hwid = hwid_line.split("HWID: ")[1]
+                keys[key_name] = {
+                    'user_id': user_id,
+                    'used': used,
+                    'duration': duration_text,
+                    'expires_at': expires_at,
+                    'hwid': hwid
+                }
+            except:
+                continue
+    return keys
+
+
+def make_message(n):
+    embed = discord.Embed(title="Generated Keys")
+    records = []
+    for i in range(n):
+        status = random.choice(list(KeyStatus))
+        record = KeyRecord(
+            f"ASTRA-{i:08X}", GUILD_ID, random.randrange(n), status, '1 day',
+            expires_at=1_900_000_000 if i % 2 and status != KeyStatus.EXPIRED else None, hwid=f"hwid-{i}" if status != KeyStatus.UNUSED else None
+        )
+        records.append(record)
+        embed.add_field(name=f"`{record.key}`", value=_ledger_field(record), inline=False)
+    message = SimpleNamespace(id=1234, embeds=[embed], guild=SimpleNamespace(id=GUILD_ID))
+    return message, records
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def run(n):
+    random.seed(n)
+    message, records = make_message(n)
+    embed = message.embeds[0]
+    calls = max(10, 200_000 // n)
+
+    old = per_call(lambda: extract_keys_from_embed(embed), calls)
+    new = per_call(lambda: parse_embed(embed, GUILD_ID), calls)
+
+    parsed = parse_message(message)
+    assert parsed == {record.key: record for record in records}
+    old_keys = extract_keys_from_embed(embed)
+    wrong_status = sum(
+        (KeyStatus.USED if old_keys[record.key]['used'] else KeyStatus.UNUSED) != record.status for record in records
+    )
+    lost_hwids = sum(old_keys[record.key]['hwid'] != record.hwid for record in records)
+
+    print(f"{n:>6} keys | old {old * 1e6:9.1f} us | parse_embed {new * 1e6:9.1f} us "
+          f"| old parser: {wrong_status} wrong statuses, {lost_hwids} lost HWIDs")
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [25, 250, 2500]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,71 @@
+"""Benchmark per-user key lookups: linear scan vs. KeyIndex.
+
+Usage: python benchmarks/bench_user_index.py [sizes...]   (default: 10000 100000 1000000)
+
+Each run builds N keys spread over N / 5 users in one guild and times the old
+get_user_keys scan against KeyIndex.user_keys for the same random users.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyindex import KeyIndex
+from keyrecord import KeyRecord
+
+GUILD_ID = 1
+KEYS_PER_USER = 5
+
+
+def linear_user_keys(keys, user_id):
+    """The pre-index get_user_keys: walk every key"""
+    user_keys = {}
+    for key, record in keys.items():
+        if record.user_id == user_id:
+            user_keys[key] = record
+    return user_keys
+
+
+def make_keys(n):
+    users = max(1, n // KEYS_PER_USER)
+    records = (
+        KeyRecord(f"ASTRA-{i:08X}", GUILD_ID, random.randrange(users), duration='Lifetime', shard=i // 20)
+        for i in range(n)
+    )
+    return {record.key: record for record in records}, users
+
+
+def per_call(fn, users, calls):
+    start = time.perf_counter()
+    for user_id in users[:calls]:
+        fn(user_id)
+    return (time.perf_counter() - start) / calls
+
+
+def run(n):
+    random.seed(n)
+    keys, user_count = make_keys(n)
+    lookups = [random.randrange(user_count) for _ in range(10000)]
+
+    start = time.perf_counter()
+    index = KeyIndex()
+    index.rebuild(keys.values())
+    build = time.perf_counter() - start
+
+    # Keep the scan's total runtime bounded at large N
+    scan = per_call(lambda user_id: linear_user_keys(keys, user_id), lookups, max(5, 2_000_000 // n))
+    indexed = per_call(lambda user_id: index.user_keys(GUILD_ID, user_id), lookups, len(lookups))
+
+    for user_id in lookups[:100]:
+        assert index.user_keys(GUILD_ID, user_id) == linear_user_keys(keys, user_id)
+
+    print(f"{n:>9} keys | index build {build * 1e3:8.1f} ms | scan {scan * 1e6:10.1f} us/lookup "
+          f"| index {indexed * 1e6:6.2f} us/lookup | {scan / indexed:9.0f}x")
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for size in sizes:
+        run(size)
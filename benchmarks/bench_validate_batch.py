@@ -0,0 +1,77 @@
+"""Benchmark the streaming batch validation endpoint.
+
+Usage: python benchmarks/bench_validate_batch.py [keys]   (default: 100000)
+
+Indexes N bound keys in a throwaway database, then POSTs one NDJSON request
+with a line for each of them (plus 1% unknown keys) to
+/api/v1/validate/batch over a local aiohttp test server. The request body is
+generated and the response consumed as streams, so the numbers include
+JSON parsing and HTTP framing on both ends, and the endpoint runs with the
+rate limits and line cap it ships with.
+"""
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+directory = tempfile.TemporaryDirectory()
+os.environ['KEYS_DB_PATH'] = os.path.join(directory.name, 'bench.db')
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+import main
+from keyrecord import KeyRecord, KeyStatus
+
+GUILD_ID = 1
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def request_body(n):
+    for start in range(0, n, 1000):
+        lines = []
+        for i in range(start, min(start + 1000, n)):
+            key = f"ASTRA-{i:08X}" if i % 100 else f"MISSING-{i:08X}"
+            lines.append(json.dumps({'key': key, 'hwid': f"hwid-{i}"}))
+        yield ('\n'.join(lines) + '\n').encode()
+
+
+async def run(n):
+    await main.store.open()
+    await main.store.add_keys(GUILD_ID, [
+        KeyRecord(f"ASTRA-{i:08X}", GUILD_ID, i, KeyStatus.USED, hwid=f"hwid-{i}") for i in range(n)
+    ])
+
+    app = web.Application()
+    app.add_routes(main.routes)
+    async with TestClient(TestServer(app)) as client:
+        rss_before = max_rss_mb()
+        start = time.perf_counter()
+        response = await client.post(
+            '/api/v1/validate/batch', data=request_body(n), headers={'Content-Type': 'application/x-ndjson'}
+        )
+        verdicts = valid = 0
+        async for line in response.content:
+            verdicts += 1
+            valid += json.loads(line)['valid']
+        elapsed = time.perf_counter() - start
+
+    await main.store.close()
+    assert verdicts == n, f"expected {n} verdicts, got {verdicts}"
+    print(f"{n:>9} keys | {elapsed * 1e3:8.0f} ms | {n / elapsed:9.0f} keys/s | valid {valid} "
+          f"| peak RSS growth during the request {max_rss_mb() - rss_before:.1f} MB")
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
+    finally:
+        directory.cleanup()
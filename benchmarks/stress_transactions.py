@@ -0,0 +1,105 @@
+"""Stress test for per-guild key transactions.
+
+Usage: python benchmarks/stress_transactions.py [mutations]   (default: 500)
+
+Against a throwaway database and a fake guild, this runs:
+  1. N concurrent key insertions, then checks that no key was lost;
+  2. N concurrent read-modify-write increments spread over a few hot keys,
+     while a competing writer bumps the same keys outside any transaction,
+     once with plain get + update_key and once with store.transaction.
+The plain version loses increments; the transactional one must not.
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyrecord import KeyRecord, KeyStatus
+from keystore import KeyStore
+
+GUILD_ID = 1
+HOT_KEYS = 5
+
+
+async def insert_keys(store, n):
+    records = [KeyRecord(f"STRESS-{i:06d}", GUILD_ID, i % 50) for i in range(n)]
+    await asyncio.gather(*(store.add_key(record) for record in records))
+    keys = await store.get_guild_keys(GUILD_ID)
+    lost = [record.key for record in records if record.key not in keys or store.index.get(GUILD_ID, record.key) is None]
+    shard_sizes = {}
+    for record in keys.values():
+        shard_sizes[record.shard] = shard_sizes.get(record.shard, 0) + 1
+    return lost, max(shard_sizes.values())
+
+
+async def competing_writer(store, keys, stop):
+    """Flips status on the hot keys outside any transaction"""
+    while not stop.is_set():
+        key = random.choice(keys)
+        record = store.index.get(GUILD_ID, key)
+        status = KeyStatus.USED if record.status == KeyStatus.UNUSED else KeyStatus.UNUSED
+        await store.update_key(GUILD_ID, key, status=status)
+        await asyncio.sleep(0)
+
+
+async def increment_plain(store, key):
+    record = await store.get_key(GUILD_ID, key)
+    await asyncio.sleep(0)  # Any await between read and write opens the race
+    await store.update_key(GUILD_ID, key, hwid=str(int(record.hwid) + 1))
+
+
+async def increment_transaction(store, key):
+    def increment(txn):
+        record = txn.get(key)
+        txn.update(key, hwid=str(int(record.hwid) + 1))
+    await store.transaction(GUILD_ID, increment, retries=50)
+
+
+async def increments(store, n, increment):
+    keys = [f"HOT-{increment.__name__}-{i}" for i in range(HOT_KEYS)]
+    await store.add_keys(GUILD_ID, [KeyRecord(key, GUILD_ID, 0, hwid='0') for key in keys])
+    targets = [keys[i % HOT_KEYS] for i in range(n)]
+
+    stop = asyncio.Event()
+    racer = asyncio.create_task(competing_writer(store, keys, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(increment(store, key) for key in targets))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await racer
+
+    total = sum(int(store.index.get(GUILD_ID, key).hwid) for key in keys)
+    stored = await store.get_guild_keys(GUILD_ID)
+    assert all(stored[key] == store.index.get(GUILD_ID, key) for key in keys), "index out of sync"
+    return n - total, elapsed
+
+
+async def main(n):
+    random.seed(n)
+    with tempfile.TemporaryDirectory() as directory:
+        store = KeyStore(os.path.join(directory, 'stress.db'))
+        await store.open()
+        try:
+            lost, largest_shard = await insert_keys(store, n)
+            print(f"inserts      | {n} concurrent | lost keys: {len(lost)} | largest shard: {largest_shard}")
+
+            lost_plain, elapsed = await increments(store, n, increment_plain)
+            print(f"plain update | {n} concurrent | lost updates: {lost_plain} | {elapsed * 1e3:.0f} ms")
+
+            conflicts = store.conflicts
+            lost_txn, elapsed = await increments(store, n, increment_transaction)
+            print(f"transaction  | {n} concurrent | lost updates: {lost_txn} | {elapsed * 1e3:.0f} ms "
+                  f"| conflicts retried: {store.conflicts - conflicts}")
+        finally:
+            await store.close()
+
+    if lost or lost_txn:
+        sys.exit("FAILED: transactional mutations lost data")
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
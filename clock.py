@@ -0,0 +1,121 @@
+"""Non-blocking UTC clock.
+
+The bot used to ask worldtimeapi.org for the time on every call, blocking the
+event loop for up to 5 seconds each time. ClockService instead syncs an offset
+against the time API in the background and serves ``system time + offset``,
+so reading the time is O(1) and never does I/O.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import aiohttp
+
+TIME_API_URL = 'http://worldtimeapi.org/api/timezone/UTC'
+
+
+class ClockService:
+    """UTC clock corrected by a background-synced offset"""
+
+    def __init__(self, url=TIME_API_URL, interval=900, timeout=5, max_backoff=3600, trace_configs=()):
+        self.url = url
+        self.interval = interval  # Seconds between successful syncs
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.trace_configs = list(trace_configs)  # aiohttp TraceConfigs for the sync session, e.g. for metrics
+
+        self.offset = 0.0  # Remote time minus system time, in seconds
+        self.drift = 0.0  # Change in offset since the previous sync, in seconds
+        self.drift_rate = 0.0  # Drift per second of elapsed time (multiply by 1e6 for ppm)
+        self.round_trip = None  # Duration of the last successful request, in seconds
+        self.last_sync = None  # time.monotonic() of the last successful sync
+        self.last_error = None
+        self.syncs = 0
+        self.failures = 0
+        self._task = None
+
+    def now(self):
+        """Current UTC time, corrected by the last synced offset"""
+        return datetime.now(timezone.utc) + timedelta(seconds=self.offset)
+
+    # -- background sync --------------------------------------------------
+
+    def start(self):
+        """Start syncing in the background (call from inside the event loop)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name='clock-sync')
+
+    async def stop(self):
+        """Stop the background sync task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        failed = 0
+        async with aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout), trace_configs=self.trace_configs
+        ) as session:
+            while True:
+                if await self.sync(session):
+                    failed = 0
+                    delay = self.interval
+                else:
+                    # Back off while the time API is unreachable; now() keeps serving the last offset
+                    failed += 1
+                    delay = min(60 * 2 ** (failed - 1), self.max_backoff)
+                await asyncio.sleep(delay)
+
+    async def sync(self, session):
+        """Measure the offset against the time API once; returns True on success"""
+        try:
+            sent = time.monotonic()
+            async with session.get(self.url) as response:
+                response.raise_for_status()
+                data = await response.json()
+            received = time.monotonic()
+            local = datetime.now(timezone.utc)
+
+            remote = datetime.fromisoformat(data['datetime'].replace('Z', '+00:00'))
+            # The server stamped its reply roughly half a round trip ago
+            round_trip = received - sent
+            offset = (remote - local).total_seconds() + round_trip / 2
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            return False
+
+        if self.last_sync is not None:
+            self.drift = offset - self.offset
+            elapsed = received - self.last_sync
+            self.drift_rate = self.drift / elapsed if elapsed > 0 else 0.0
+        self.offset = offset
+        self.round_trip = round_trip
+        self.last_sync = received
+        self.last_error = None
+        self.syncs += 1
+        return True
+
+    # -- health -----------------------------------------------------------
+
+    def status(self):
+        """Sync health and drift, for logs and health checks"""
+        age = time.monotonic() - self.last_sync if self.last_sync is not None else None
+        return {
+            'synced': age is not None,
+            'healthy': age is not None and age < self.interval * 3,
+            'offset_seconds': round(self.offset, 6),
+            'drift_seconds': round(self.drift, 6),
+            'drift_ppm': round(self.drift_rate * 1e6, 3),
+            'round_trip_seconds': round(self.round_trip, 6) if self.round_trip is not None else None,
+            'last_sync_age_seconds': round(age, 3) if age is not None else None,
+            'syncs': self.syncs,
+            'failures': self.failures,
+            'last_error': self.last_error
+        }
@@ -0,0 +1,135 @@
+"""Rendering of the bot's key embeds.
+
+The "Generated Keys" ledger and the customers' key lists used to re-format
+every field each time anything changed. EmbedRenderer memoizes the text of
+each key's field against the record it was rendered from, so re-rendering a
+shard after a single-key change only formats that one field. The static
+customer support panel is built once.
+"""
+from datetime import datetime
+
+import discord
+
+from keyrecord import from_epoch
+
+EXPIRES_FORMAT = '%Y-%m-%d %H:%M:%S'
+MAX_HWID_DISPLAY = 128  # Keeps a ledger field well under Discord's 1024-character limit
+
+
+def _ledger_field(record):
+    """Field text in the #keys ledger; the legacy importer parses this format"""
+    value_text = f"User: <@{record.user_id}>\nStatus: {record.status.label}\nDuration: {record.duration}"
+    if record.expires_at is not None and not record.expired:
+        value_text += f"\nExpires: {from_epoch(record.expires_at).strftime(EXPIRES_FORMAT)}"
+    if record.hwid:
+        hwid = record.hwid if len(record.hwid) <= MAX_HWID_DISPLAY else record.hwid[:MAX_HWID_DISPLAY] + '...'
+        value_text += f"\nHWID: {hwid}"
+    return value_text
+
+
+def _user_field(record):
+    """Field text in a customer's own key list"""
+    value_text = f"**Status:** {record.status.label}\n**Duration:** {record.duration}"
+    if record.expires_at is not None and not record.expired:
+        value_text += f"\n**Expires:** {from_epoch(record.expires_at).strftime(EXPIRES_FORMAT)}"
+    if record.hwid:
+        value_text += f"\n**HWID:** `{record.hwid[:8]}...`"
+    return value_text
+
+
+FIELD_STYLES = {
+    'ledger': _ledger_field,
+    'user': _user_field
+}
+
+
+class EmbedRenderer:
+    """Builds key embeds, re-formatting only the fields whose record changed"""
+
+    def __init__(self):
+        self._fields = {}  # (style, key) -> (record rendered, field text)
+        self._customer_embed = None
+        self.hits = 0
+        self.misses = 0
+
+    def _field(self, style, record):
+        cached = self._fields.get((style, record.key))
+        # Records are replaced rather than modified, so an equal record renders the same text
+        if cached is not None and (cached[0] is record or cached[0] == record):
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        value_text = FIELD_STYLES[style](record)
+        self._fields[(style, record.key)] = (record, value_text)
+        return value_text
+
+    def forget(self, key):
+        """Drop a deleted key's cached fields"""
+        for style in FIELD_STYLES:
+            self._fields.pop((style, key), None)
+
+    def keys_embed(self, keys, shard=0):
+        """The "Generated Keys" embed for one ledger shard"""
+        embed = discord.Embed(
+            title="Generated Keys" if shard == 0 else f"Generated Keys (page {shard + 1})",
+            color=0x0099ff,
+            timestamp=datetime.now()
+        )
+
+        if keys:
+            for key, record in keys.items():
+                embed.add_field(name=f"`{key}`", value=self._field('ledger', record), inline=True)
+        elif shard == 0:
+            embed.description = "No keys have been generated yet."
+        else:
+            embed.description = "No keys on this page."
+
+        embed.set_footer(text=f"Page {shard + 1} - Keys: {len(keys)}")
+        return embed
+
+    def user_keys_embed(self, user_keys, timestamp):
+        """A customer's own keys; callers may append further fields"""
+        embed = discord.Embed(
+            title="🔑 Your Authentication Keys",
+            color=0x0099ff,
+            timestamp=timestamp
+        )
+        for key, record in user_keys.items():
+            embed.add_field(name=f"`{key}`", value=self._field('user', record), inline=True)
+        return embed
+
+    def customer_embed(self):
+        """The customer support panel; built once and shared, so never modify it"""
+        if self._customer_embed is None:
+            embed = discord.Embed(
+                title="👑 Customer Support",
+                description="",
+                color=0x2f3136  # Dark grey background
+            )
+            embed.add_field(
+                name="**Fetch Key**",
+                value="Forgot your key? Click \"**Fetch Key**\" to retrieve it if it's linked to your Discord account.",
+                inline=False
+            )
+            embed.add_field(
+                name="**Reset HWID**",
+                value="Click \"**Reset HWID**\", enter your key – if it's assigned to you, the HWID will be reset.",
+                inline=False
+            )
+            embed.add_field(
+                name="***Note:***",
+                value="*HWID resets have a 24h cooldown. Repeated resets may flag your key for sharing. Contact us if you need an early reset.*",
+                inline=False
+            )
+            self._customer_embed = embed
+        return self._customer_embed
+
+    def stats(self):
+        """Field cache metrics"""
+        lookups = self.hits + self.misses
+        return {
+            'cached_fields': len(self._fields),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
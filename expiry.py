@@ -0,0 +1,83 @@
+"""Background expiry of keys.
+
+Expiry used to be recomputed at render time by re-parsing every key's
+timestamp in each ledger loop. ExpirySweeper instead sleeps until the
+earliest expiry in the key index, flags every key that is due as expired in
+one store transaction, hands the touched ledger shards to a callback, and
+goes back to sleep.
+"""
+import asyncio
+
+
+class ExpirySweeper:
+    """Single background task that flips due keys to Expired"""
+
+    def __init__(self, store, clock, on_expired, max_sleep=3600, retry_delay=30):
+        self.store = store
+        self.clock = clock
+        self.on_expired = on_expired  # on_expired(guild_id, shards) after a batch is stored
+        self.max_sleep = max_sleep  # Wake up at least this often, in case the clock offset moved
+        self.retry_delay = retry_delay
+
+        self.sweeps = 0
+        self.expired = 0
+        self._wake = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        """Start the sweeper (call from inside the event loop)"""
+        self.store.index.expiry_listener = self.wake
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name='expiry-sweeper')
+
+    async def stop(self):
+        """Stop the sweeper"""
+        self.store.index.expiry_listener = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self):
+        """Re-check the next expiry now (a key with an earlier expiry was added)"""
+        self._wake.set()
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error expiring keys: {str(e)}")
+                await asyncio.sleep(self.retry_delay)
+                continue
+
+            next_expiry = self.store.index.next_expiry()
+            timeout = self.max_sleep
+            if next_expiry is not None:
+                timeout = min(max(next_expiry - self.clock.now().timestamp(), 0), self.max_sleep)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def sweep(self):
+        """Expire every key that is due; returns how many were expired"""
+        due = self.store.index.pop_due(self.clock.now().timestamp())
+        if not due:
+            return 0
+        try:
+            touched = await self.store.expire_keys(due)
+        except Exception:
+            self.store.index.requeue_expiry(due)
+            raise
+        for guild_id, shards in touched.items():
+            self.on_expired(guild_id, shards)
+        self.sweeps += 1
+        self.expired += len(due)
+        return len(due)
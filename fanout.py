@@ -0,0 +1,41 @@
+"""Bounded-concurrency fan-out.
+
+Sending hundreds of DMs one after another takes minutes, and starting them
+all at once just queues them behind Discord's rate limits while holding a
+task and a request each. FanOut runs one async job per item with a fixed
+number of workers pulling from a shared iterator, so at most ``concurrency``
+calls are in flight and a failing item never stops the others.
+"""
+import asyncio
+
+
+class FanOut:
+    """One run of ``job(item)`` over items, ``concurrency`` at a time"""
+
+    def __init__(self, concurrency=5):
+        self.concurrency = concurrency
+        self.total = 0
+        self.done = 0  # Items finished, failed or not
+        self.failures = []  # (item, exception), in completion order
+
+    async def run(self, items, job):
+        """Run job(item) for every item; returns the failures"""
+        items = list(items)
+        self.total = len(items)
+        iterator = iter(items)
+
+        async def worker():
+            # Workers share the iterator, so each item is taken exactly once
+            for item in iterator:
+                try:
+                    await job(item)
+                except Exception as e:
+                    self.failures.append((item, e))
+                self.done += 1
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, self.total))))
+        return self.failures
+
+    @property
+    def succeeded(self):
+        return self.done - len(self.failures)
@@ -0,0 +1,169 @@
+"""Metrics for the bot's outbound Discord and HTTP calls.
+
+discord.py sends REST calls through HTTPClient.request and interaction
+responses through the webhook adapter's request; both take a Route whose
+path is the URL template (e.g. /channels/{channel_id}/messages), which keeps
+label cardinality fixed. instrument_requests() wraps such a method to count
+and time every call, labelled with the command or interaction that made it.
+Rate-limit sleeps happen inside discord.py. Most are pre-emptive: a bucket
+that Discord reported as exhausted is slept on before the next call, and is
+only logged at DEBUG. instrument_rate_limits() times those sleeps where
+discord.py takes them; the sleeps after a 429 are counted from their
+WARNING log line by RateLimitLogFilter. The bot's own aiohttp
+sessions (the clock sync and snapshot downloads) are timed by an aiohttp
+TraceConfig from HttpClientMetrics instead.
+"""
+import logging
+import time
+
+import aiohttp
+from discord import http
+from discord.webhook import async_ as webhook
+
+from metrics import operation
+
+RATE_LIMIT_MESSAGES = {
+    # Logger message format -> index of the retry delay in the record's args
+    'We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.': 2,
+    'Webhook ID %s is rate limited. Retrying in %.2f seconds.': 1,
+    'Global rate limit has been hit. Retrying in %.2f seconds.': 0,
+}
+
+
+class DiscordCallMetrics:
+    """Counters, latency histogram and in-flight gauge for Discord API calls"""
+
+    def __init__(self, registry):
+        self.total = registry.counter(
+            'discord_api_requests_total', 'Discord API calls', ('operation', 'method', 'route', 'status')
+        )
+        self.latency = registry.histogram(
+            'discord_api_request_duration_seconds', 'Discord API call latency, including rate-limit sleeps',
+            ('method', 'route')
+        )
+        self.in_flight = registry.gauge('discord_api_requests_in_flight', 'Discord API calls waiting for a response')
+        self.rate_limit_waits = registry.counter(
+            'discord_rate_limit_waits_total',
+            'Times discord.py slept on a rate limit, on an exhausted bucket or after a 429', ('reason',)
+        )
+        self.rate_limit_wait_seconds = registry.counter(
+            'discord_rate_limit_wait_seconds_total', 'Seconds discord.py slept on rate limits', ('reason',)
+        )
+
+    def instrument_requests(self, client):
+        """Wrap client.request(route, ...) once"""
+        request = client.request
+        if getattr(request, '_instrumented', False):
+            return
+
+        async def instrumented(route, *args, **kwargs):
+            self.in_flight.inc()
+            start = time.perf_counter()
+            status = 'error'
+            try:
+                result = await request(route, *args, **kwargs)
+                status = 'ok'
+                return result
+            except Exception as e:
+                status = str(getattr(e, 'status', 'error'))
+                raise
+            finally:
+                self.in_flight.dec()
+                self.latency.observe(time.perf_counter() - start, route.method, route.path)
+                self.total.inc(operation.get(), route.method, route.path, status)
+
+        instrumented._instrumented = True
+        client.request = instrumented
+
+    def instrument_rate_limits(self):
+        """Time discord.py's pre-emptive sleeps on exhausted buckets (REST and webhooks), once"""
+        refresh = http.Ratelimit._refresh
+        if getattr(refresh, '_instrumented', False):
+            return
+
+        async def instrumented_refresh(ratelimit):
+            # Sleeps until the bucket resets, then wakes the requests queued on it
+            start = time.perf_counter()
+            try:
+                await refresh(ratelimit)
+            finally:
+                self.record_rate_limit_wait('bucket', time.perf_counter() - start)
+
+        exit_lock = webhook.AsyncDeferredLock.__aexit__
+
+        async def instrumented_exit(lock, *exc_info):
+            # Holds the webhook's lock for the delay its exhausted bucket asked for
+            if lock.delta:
+                self.record_rate_limit_wait('bucket', lock.delta)
+            return await exit_lock(lock, *exc_info)
+
+        instrumented_refresh._instrumented = True
+        http.Ratelimit._refresh = instrumented_refresh
+        webhook.AsyncDeferredLock.__aexit__ = instrumented_exit
+
+    def record_rate_limit_wait(self, reason, seconds):
+        self.rate_limit_waits.inc(reason)
+        self.rate_limit_wait_seconds.inc(reason, amount=seconds)
+
+    def rate_limit_filter(self):
+        """A logging filter that counts discord.py's rate-limit sleeps"""
+        return RateLimitLogFilter(self)
+
+
+class HttpClientMetrics:
+    """Counters, latency histogram and in-flight gauge for the bot's own aiohttp requests"""
+
+    def __init__(self, registry):
+        self.total = registry.counter(
+            'http_client_requests_total', 'Outbound HTTP requests outside discord.py',
+            ('operation', 'method', 'host', 'status')
+        )
+        self.latency = registry.histogram(
+            'http_client_request_duration_seconds', 'Outbound HTTP latency until the response headers arrive',
+            ('method', 'host')
+        )
+        self.in_flight = registry.gauge('http_client_requests_in_flight', 'Outbound HTTP requests waiting for a response')
+
+    def trace_config(self):
+        """An aiohttp TraceConfig to pass in a ClientSession's trace_configs"""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_start(session, context, params):
+            context.start = time.perf_counter()
+            self.in_flight.inc()
+
+        async def on_end(session, context, params):
+            self._observe(context, params.method, params.url, str(params.response.status))
+
+        async def on_exception(session, context, params):
+            self._observe(context, params.method, params.url, 'error')
+
+        trace_config.on_request_start.append(on_start)
+        trace_config.on_request_end.append(on_end)
+        trace_config.on_request_exception.append(on_exception)
+        return trace_config
+
+    def _observe(self, context, method, url, status):
+        # Hosts, not URLs: snapshot URLs are signed per attachment and would grow the label set forever
+        host = url.host or ''
+        self.in_flight.dec()
+        self.latency.observe(time.perf_counter() - context.start, method, host)
+        self.total.inc(operation.get(), method, host, status)
+
+
+class RateLimitLogFilter(logging.Filter):
+    """Counts the sleeps after a 429 from discord.py's warnings; never drops a record"""
+
+    def __init__(self, metrics):
+        super().__init__()
+        self.metrics = metrics
+
+    def filter(self, record):
+        index = RATE_LIMIT_MESSAGES.get(record.msg)
+        if index is not None:
+            try:
+                seconds = float(record.args[index])
+            except (IndexError, TypeError, ValueError):
+                seconds = 0.0
+            self.metrics.record_rate_limit_wait('429', seconds)
+        return True
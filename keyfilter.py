@@ -0,0 +1,85 @@
+"""Counting Bloom filter over the indexed keys.
+
+Legacy keys are ``ASTRA-XXXXX``, a small keyspace that is cheap to guess
+at, so most validation traffic from a guessing client is for keys that don't
+exist. KeyFilter answers "definitely not a key" from a compact array of
+counters without touching the key index. Counters, not bits, so keys can be
+removed again when they are deleted.
+"""
+import math
+
+MAX_COUNT = 255  # A saturated counter is never decremented, so it can't cause false negatives
+
+
+class KeyFilter:
+    """Counting Bloom filter sized for ``capacity`` keys at ``error_rate`` false positives"""
+
+    def __init__(self, capacity=1024, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._counters = bytearray(self.size)
+        self.count = 0
+
+        self.queries = 0
+        self.rejected = 0
+        self.false_positives = 0  # Passed the filter but weren't keys; counted by the caller
+
+    def _positions(self, key):
+        # Double hashing from the 64-bit str hash, which Python caches on the string.
+        # It's salted per process, which is fine: the filter is rebuilt at startup.
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, key):
+        counters = self._counters
+        for position in self._positions(key):
+            if counters[position] < MAX_COUNT:
+                counters[position] += 1
+        self.count += 1
+
+    def remove(self, key):
+        """Remove a key that was added before"""
+        counters = self._counters
+        for position in self._positions(key):
+            if 0 < counters[position] < MAX_COUNT:
+                counters[position] -= 1
+        self.count -= 1
+
+    def __contains__(self, key):
+        """False means the key was certainly never added"""
+        # Same positions as _positions(), inlined to stop at the first empty counter
+        self.queries += 1
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        counters = self._counters
+        size = self.size
+        for i in range(self.hashes):
+            if not counters[(h1 + i * h2) % size]:
+                self.rejected += 1
+                return False
+        return True
+
+    def expected_fpr(self):
+        """False-positive rate expected at the current fill"""
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+    def stats(self):
+        """Filter metrics"""
+        negatives = self.false_positives + self.rejected
+        return {
+            'keys': self.count,
+            'capacity': self.capacity,
+            'hashes': self.hashes,
+            'memory_bytes': self.size,
+            'expected_fpr': round(self.expected_fpr(), 6),
+            'queries': self.queries,
+            'rejected': self.rejected,
+            'false_positives': self.false_positives,
+            'observed_fpr': round(self.false_positives / negatives, 6) if negatives else 0.0
+        }
@@ -0,0 +1,93 @@
+"""Versioned, self-checking key format.
+
+Looking up a key costs an index probe, and for commands a legacy ledger
+import first, so a mistyped key used to be rejected only after that work.
+Versioned keys carry their format version after the prefix and end in a
+check character:
+
+    ASTRA1-KASWW-CDKN7-YQDJ5
+
+The check character is Luhn mod 32 over the version and the random
+characters, which catches every single-character typo and most swapped
+neighbours. KeyFormat.is_well_formed() verifies it in a few microseconds
+without any lookup. It checks any versioned head and any group layout, not
+just the configured ones, so keys issued before an operator changed
+KEY_PREFIX, KEY_GROUPS or KEY_GROUP_LENGTH keep validating. Unversioned keys
+(legacy ``ASTRA-XXXXX`` and the grouped keys issued before versioning) have
+no check character and are only checked for shape.
+"""
+import re
+import secrets
+
+# Crockford's base32: no I, L, O or U, so keys survive being read out or retyped
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+LEGACY_PREFIX = 'ASTRA'
+VERSION = '1'
+
+# Unversioned keys: PREFIX-XXXXX with one or more groups of uppercase letters and digits
+UNVERSIONED_BODY = re.compile(r'[A-Z0-9]+(?:-[A-Z0-9]+)*')
+
+# Longer strings are never keys; bounds the work of checking one
+MAX_KEY_LENGTH = 128
+
+
+def check_character(values, alphabet=ALPHABET):
+    """Luhn mod N check character for a sequence of alphabet indexes"""
+    n = len(alphabet)
+    factor = 2
+    total = 0
+    for value in reversed(values):
+        addend = factor * value
+        total += addend // n + addend % n
+        factor = 3 - factor
+    return alphabet[-total % n]
+
+
+class KeyFormat:
+    """Keys like ``PREFIX1-XXXXX-XXXXX-XXXXC``: ``groups`` dash-separated groups, the last character a check"""
+
+    def __init__(self, prefix=LEGACY_PREFIX, groups=3, group_length=5, alphabet=ALPHABET):
+        if not prefix or prefix[-1].isdigit():
+            raise ValueError("Key prefix must not end in a digit, it is followed by the format version")
+        self.prefix = prefix
+        self.groups = groups
+        self.group_length = group_length
+        self.alphabet = alphabet
+        self._values = {char: i for i, char in enumerate(alphabet)}
+        self._head = prefix + VERSION
+
+    @property
+    def bits(self):
+        """Random bits in one key (every character but the check)"""
+        return (self.groups * self.group_length - 1) * (len(self.alphabet).bit_length() - 1)
+
+    def random_key(self):
+        """A new random key with its check character"""
+        choice = secrets.choice
+        alphabet = self.alphabet
+        chars = [choice(alphabet) for _ in range(self.groups * self.group_length - 1)]
+        chars.append(check_character([self._values[char] for char in VERSION + ''.join(chars)], alphabet))
+        body = ''.join(chars)
+        size = self.group_length
+        return '-'.join([self._head] + [body[i:i + size] for i in range(0, len(body), size)])
+
+    def is_well_formed(self, key):
+        """False if key can't be a key this bot issued; needs no lookup"""
+        if not isinstance(key, str) or len(key) > MAX_KEY_LENGTH:
+            return False
+        head, _, body = key.partition('-')
+        if len(head) > len(VERSION) and head.endswith(VERSION):
+            # Any prefix and layout: the format settings may have changed since the key was issued
+            groups = body.split('-')
+            if '' in groups:
+                return False
+            values = self._values
+            try:
+                indexes = [values[char] for char in VERSION + ''.join(groups)]
+            except KeyError:
+                return False
+            return check_character(indexes[:-1], self.alphabet) == self.alphabet[indexes[-1]]
+        if head == self.prefix or head == LEGACY_PREFIX:
+            return UNVERSIONED_BODY.fullmatch(body) is not None
+        return False
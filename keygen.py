@@ -0,0 +1,115 @@
+"""License key generation.
+
+Keys used to be ``ASTRA-`` plus 5 characters from random.choices: about 60
+million possibilities from a non-cryptographic generator whose state can be
+recovered from its output, and nothing checked a new key against the keys
+that already exist. KeyGenerator draws keys in a KeyFormat, whose
+characters come from the secrets module, and rejects any key that is
+already indexed. Keys are made ahead of time by a background task into a
+pool, so issuing one (or a few hundred) is a deque pop.
+"""
+import asyncio
+from collections import deque
+
+
+class KeyGenerator:
+    """Pool of unused random keys in ``key_format``, refilled in the background"""
+
+    def __init__(self, index, key_format, pool_size=256, max_attempts=100):
+        self.index = index  # KeyIndex of every stored key, for collision checks
+        self.format = key_format
+        self.pool_size = pool_size
+        self.max_attempts = max_attempts
+
+        self._pool = deque()
+        self._pooled = set()  # Keys in the pool, so the pool never holds a key twice
+        self._low = asyncio.Event()
+        self._task = None
+
+        self.generated = 0
+        self.collisions = 0
+        self.issued = 0
+        self.pool_misses = 0  # Keys generated on demand because the pool was empty
+
+    def _new_key(self):
+        for _ in range(self.max_attempts):
+            key = self.format.random_key()
+            self.generated += 1
+            if key not in self.index and key not in self._pooled:
+                return key
+            self.collisions += 1
+        raise RuntimeError(f"No unused key after {self.max_attempts} attempts; the key format is too short")
+
+    # -- issuing ----------------------------------------------------------
+
+    def take(self):
+        """A key that isn't in the index; never waits for the pool"""
+        key = None
+        while self._pool:
+            candidate = self._pool.popleft()
+            self._pooled.discard(candidate)
+            # Another path (e.g. a legacy import) may have stored it since it was pooled
+            if candidate not in self.index:
+                key = candidate
+                break
+            self.collisions += 1
+        if key is None:
+            self.pool_misses += 1
+            key = self._new_key()
+        self.issued += 1
+        if len(self._pool) < self.pool_size // 2:
+            self._low.set()
+        return key
+
+    def take_many(self, n):
+        """n distinct keys that aren't in the index"""
+        keys = []
+        seen = set()
+        while len(keys) < n:
+            key = self.take()
+            if key not in seen:
+                seen.add(key)
+                keys.append(key)
+        return keys
+
+    # -- background refill ------------------------------------------------
+
+    def start(self):
+        """Fill the pool in the background (call from inside the event loop, after the index is built)"""
+        self._low.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name='key-pool')
+
+    async def stop(self):
+        """Stop refilling"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, chunk=32):
+        while True:
+            await self._low.wait()
+            self._low.clear()
+            while len(self._pool) < self.pool_size:
+                for _ in range(min(chunk, self.pool_size - len(self._pool))):
+                    key = self._new_key()
+                    self._pool.append(key)
+                    self._pooled.add(key)
+                # Let other callbacks run between chunks
+                await asyncio.sleep(0)
+
+    def stats(self):
+        """Generator metrics"""
+        return {
+            'pool': len(self._pool),
+            'pool_size': self.pool_size,
+            'bits': self.format.bits,
+            'generated': self.generated,
+            'issued': self.issued,
+            'collisions': self.collisions,
+            'pool_misses': self.pool_misses
+        }
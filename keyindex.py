@@ -0,0 +1,150 @@
+"""In-memory index over the keys table.
+
+KeyStore keeps one KeyIndex in sync with every write and rebuilds it from
+the database once at startup, so per-key and per-user reads never touch
+SQLite. Looking up a user's keys costs O(k) in that user's keys instead of
+a scan over every key, and a min-heap on expiry time tells the expiry
+sweeper which key is due next without scanning anything. A counting Bloom
+filter (keyfilter.py) rejects most lookups of keys that don't exist.
+"""
+import heapq
+
+from keyfilter import KeyFilter
+from keyrecord import KeyStatus
+
+
+def _pending_expiry(record):
+    """Epoch seconds at which a key is due to expire, or None if it never will"""
+    return None if record.status == KeyStatus.EXPIRED else record.expires_at
+
+
+class KeyIndex:
+    """key -> KeyRecord map with per-user and expiry secondary indexes"""
+
+    def __init__(self):
+        self._keys = {}  # key -> KeyRecord
+        self._by_user = {}  # (guild_id, user_id) -> {key: None}, in creation order
+        self._expiry = []  # Min-heap of (expires_at, key); stale entries are skipped lazily
+        self.expiry_listener = None  # Called when the earliest pending expiry moves earlier
+        self.filter = KeyFilter()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def rebuild(self, records):
+        """Replace the whole index with the given KeyRecords"""
+        records = list(records)
+        self._keys = {}
+        self._by_user = {}
+        self._expiry = []
+        self.filter = KeyFilter(max(1024, 2 * len(records)))
+        for record in records:
+            self.put(record)
+
+    def put(self, record):
+        """Insert or replace a key
+
+        Records are never modified in place; a write swaps in a new record,
+        so callers can keep reading a record they were handed earlier. A
+        record older than the indexed version is ignored.
+        """
+        key = record.key
+        old = self._keys.get(key)
+        if old is not None and record.version < old.version:
+            # A slower writer finished after a newer write was indexed
+            return
+        if old is None:
+            self._add_to_filter(key)
+        elif (old.guild_id, old.user_id) != (record.guild_id, record.user_id):
+            self._unlink(old.guild_id, old.user_id, key)
+        self._keys[key] = record
+        self._by_user.setdefault((record.guild_id, record.user_id), {})[key] = None
+
+        timestamp = _pending_expiry(record)
+        if timestamp is not None and (old is None or _pending_expiry(old) != timestamp):
+            earliest = self.next_expiry()
+            heapq.heappush(self._expiry, (timestamp, key))
+            if self.expiry_listener is not None and (earliest is None or timestamp < earliest):
+                self.expiry_listener()
+
+    def remove(self, key):
+        """Drop a key; returns its record, or None if it wasn't indexed"""
+        old = self._keys.pop(key, None)
+        if old is None:
+            return None
+        self.filter.remove(key)
+        self._unlink(old.guild_id, old.user_id, key)
+        return old
+
+    def _add_to_filter(self, key):
+        if self.filter.count >= self.filter.capacity:
+            # Full: rebuild at twice the size so the false-positive rate stays at its target
+            old = self.filter
+            self.filter = KeyFilter(2 * old.capacity, old.error_rate)
+            for indexed in self._keys:
+                self.filter.add(indexed)
+            self.filter.queries, self.filter.rejected = old.queries, old.rejected
+            self.filter.false_positives = old.false_positives
+        self.filter.add(key)
+
+    def _unlink(self, guild_id, user_id, key):
+        user_keys = self._by_user.get((guild_id, user_id))
+        if user_keys is not None:
+            user_keys.pop(key, None)
+            if not user_keys:
+                del self._by_user[(guild_id, user_id)]
+
+    def get(self, guild_id, key):
+        """A key's record, or None if the guild has no such key"""
+        record = self._keys.get(key)
+        if record is None or record.guild_id != guild_id:
+            return None
+        return record
+
+    def find(self, key):
+        """A key's record in whichever guild holds it, or None (keys are globally unique)"""
+        if key not in self.filter:
+            return None
+        record = self._keys.get(key)
+        if record is None:
+            self.filter.false_positives += 1
+        return record
+
+    def user_keys(self, guild_id, user_id):
+        """All keys belonging to a user, as {key: KeyRecord}"""
+        keys = self._by_user.get((guild_id, user_id))
+        if not keys:
+            return {}
+        return {key: self._keys[key] for key in keys}
+
+    # -- expiry -----------------------------------------------------------
+
+    def _is_live(self, timestamp, key):
+        record = self._keys.get(key)
+        return record is not None and _pending_expiry(record) == timestamp
+
+    def next_expiry(self):
+        """Timestamp of the earliest key still waiting to expire, or None"""
+        while self._expiry and not self._is_live(*self._expiry[0]):
+            heapq.heappop(self._expiry)
+        return self._expiry[0][0] if self._expiry else None
+
+    def pop_due(self, now):
+        """Remove and return the keys whose expiry is at or before ``now``"""
+        due = {}
+        while self._expiry and self._expiry[0][0] <= now:
+            timestamp, key = heapq.heappop(self._expiry)
+            if self._is_live(timestamp, key):
+                due[key] = None
+        return list(due)
+
+    def requeue_expiry(self, keys):
+        """Put keys returned by pop_due back, e.g. after storing them failed"""
+        for key in keys:
+            record = self._keys.get(key)
+            timestamp = _pending_expiry(record) if record is not None else None
+            if timestamp is not None:
+                heapq.heappush(self._expiry, (timestamp, key))
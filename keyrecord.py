@@ -0,0 +1,118 @@
+"""Compact representation of a key.
+
+Keys used to be free-form dicts holding ISO strings that were re-parsed on
+every comparison, and the legacy ledger's timezone-less strings could not be
+compared with aware datetimes at all. A KeyRecord is a ``__slots__`` object
+with an integer status and integer epoch seconds (UTC), which keeps large
+key sets small in memory and makes every expiry check an int comparison.
+"""
+from datetime import datetime, timezone
+from enum import IntEnum
+
+
+class KeyStatus(IntEnum):
+    UNUSED = 0
+    USED = 1
+    EXPIRED = 2
+
+    @property
+    def label(self):
+        """Display name, e.g. "Unused\""""
+        return self.name.capitalize()
+
+
+_STATUSES = tuple(KeyStatus)
+
+# Column order of the keys table; KeyRecord's slots follow it so rows decode positionally
+COLUMNS = ('key', 'guild_id', 'user_id', 'status', 'duration', 'created_at', 'expires_at', 'hwid', 'shard', 'version')
+SELECT_COLUMNS = ', '.join(COLUMNS)
+
+
+class KeyRecord:
+    """One key; timestamps are int epoch seconds (UTC) or None
+
+    ``version`` is bumped by every write to the key, for optimistic concurrency.
+    """
+
+    __slots__ = COLUMNS
+
+    def __init__(self, key, guild_id, user_id, status=KeyStatus.UNUSED, duration='Unknown',
+                 created_at=None, expires_at=None, hwid=None, shard=0, version=0):
+        self.key = key
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.status = _STATUSES[status]
+        self.duration = duration or 'Unknown'
+        self.created_at = created_at
+        self.expires_at = expires_at
+        self.hwid = hwid
+        self.shard = shard
+        self.version = version
+
+    def __repr__(self):
+        return f"KeyRecord({', '.join(f'{name}={getattr(self, name)!r}' for name in COLUMNS)})"
+
+    def __eq__(self, other):
+        if not isinstance(other, KeyRecord):
+            return NotImplemented
+        return self.to_row() == other.to_row()
+
+    @property
+    def used(self):
+        return self.status == KeyStatus.USED
+
+    @property
+    def expired(self):
+        return self.status == KeyStatus.EXPIRED
+
+    def is_due(self, now):
+        """Whether the key has passed its expiry at epoch time ``now``"""
+        return self.expires_at is not None and self.expires_at <= now
+
+    def replace(self, **changes):
+        """A copy with some fields changed; records are never modified once shared"""
+        record = KeyRecord.__new__(KeyRecord)
+        for name in COLUMNS:
+            setattr(record, name, changes[name] if name in changes else getattr(self, name))
+        record.status = _STATUSES[record.status]
+        return record
+
+    def to_row(self):
+        """Column values in table order"""
+        return (self.key, self.guild_id, self.user_id, int(self.status), self.duration,
+                self.created_at, self.expires_at, self.hwid, self.shard, self.version)
+
+
+# -- bulk codec -----------------------------------------------------------
+
+def decode_rows(rows):
+    """Rows selected as SELECT_COLUMNS -> KeyRecords"""
+    return [KeyRecord(*row) for row in rows]
+
+
+def encode_records(records):
+    """KeyRecords -> parameter tuples in COLUMNS order"""
+    return [record.to_row() for record in records]
+
+
+# -- timestamps -----------------------------------------------------------
+
+def to_epoch(value):
+    """An aware/naive datetime or ISO string -> int epoch seconds; naive means UTC"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def from_epoch(timestamp):
+    """int epoch seconds -> aware UTC datetime (None stays None)"""
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc)
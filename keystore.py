@@ -0,0 +1,483 @@
+"""SQLite-backed key store.
+
+The ``keys`` table is the source of truth for every key. The "Generated Keys"
+embed in #keys is only a rendered view of it. An in-memory KeyIndex mirrors
+the table so single-key and per-user reads are served without a query.
+Rows are decoded straight into slotted KeyRecords (see keyrecord.py).
+"""
+import asyncio
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from keyindex import KeyIndex
+from keyrecord import COLUMNS, SELECT_COLUMNS, KeyStatus, decode_rows
+from transaction import KeyConflict, KeyTransaction
+
+DB_PATH = os.getenv('KEYS_DB_PATH', 'keys.db')
+
+# Keys per ledger message; keeps each embed well under the 25-field/6000-character limits
+KEYS_PER_SHARD = 20
+
+# Each entry upgrades the schema by one version (tracked in PRAGMA user_version)
+MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS keys (
+        key TEXT PRIMARY KEY,
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        used INTEGER NOT NULL DEFAULT 0,
+        duration TEXT,
+        expires_at TEXT,
+        created_at TEXT,
+        hwid TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_keys_user ON keys (guild_id, user_id);
+    CREATE INDEX IF NOT EXISTS idx_keys_expires_at ON keys (expires_at);
+    CREATE TABLE IF NOT EXISTS guilds (
+        guild_id INTEGER PRIMARY KEY,
+        legacy_imported INTEGER NOT NULL DEFAULT 0
+    );
+    """,
+    """
+    ALTER TABLE guilds ADD COLUMN keys_channel_id INTEGER;
+    ALTER TABLE guilds ADD COLUMN keys_message_id INTEGER;
+    ALTER TABLE guilds ADD COLUMN customer_channel_id INTEGER;
+    ALTER TABLE guilds ADD COLUMN customer_message_id INTEGER;
+    """,
+    # v3: the ledger is split across several messages ("shards"); guilds.keys_message_id is superseded
+    """
+    ALTER TABLE keys ADD COLUMN shard INTEGER NOT NULL DEFAULT 0;
+    -- Spread existing keys over shards of KEYS_PER_SHARD (20) in creation order
+    UPDATE keys SET shard = (
+        SELECT COUNT(*) FROM keys AS k WHERE k.guild_id = keys.guild_id AND k.rowid < keys.rowid
+    ) / 20;
+    CREATE INDEX IF NOT EXISTS idx_keys_shard ON keys (guild_id, shard);
+    CREATE TABLE IF NOT EXISTS ledger_messages (
+        guild_id INTEGER NOT NULL,
+        shard INTEGER NOT NULL,
+        message_id INTEGER NOT NULL,
+        PRIMARY KEY (guild_id, shard)
+    );
+    INSERT INTO ledger_messages (guild_id, shard, message_id)
+        SELECT guild_id, 0, keys_message_id FROM guilds WHERE keys_message_id IS NOT NULL;
+    """,
+    # v4: expiry is flagged by the sweeper instead of being recomputed at render time
+    """
+    ALTER TABLE keys ADD COLUMN expired INTEGER NOT NULL DEFAULT 0;
+    """,
+    # v5: used/expired collapse into one status (0 unused, 1 used, 2 expired); timestamps become
+    # epoch seconds. The table is rebuilt with the same rowids so creation order is kept.
+    """
+    CREATE TABLE keys_new (
+        key TEXT PRIMARY KEY,
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        status INTEGER NOT NULL DEFAULT 0,
+        duration TEXT,
+        created_at INTEGER,
+        expires_at INTEGER,
+        hwid TEXT,
+        shard INTEGER NOT NULL DEFAULT 0
+    );
+    INSERT INTO keys_new (rowid, key, guild_id, user_id, status, duration, created_at, expires_at, hwid, shard)
+        SELECT rowid, key, guild_id, user_id,
+               CASE WHEN expired THEN 2 WHEN used THEN 1 ELSE 0 END,
+               duration,
+               CAST(strftime('%s', created_at) AS INTEGER),
+               CAST(strftime('%s', expires_at) AS INTEGER),
+               hwid, shard
+        FROM keys;
+    DROP TABLE keys;
+    ALTER TABLE keys_new RENAME TO keys;
+    CREATE INDEX idx_keys_user ON keys (guild_id, user_id);
+    CREATE INDEX idx_keys_expires_at ON keys (expires_at);
+    CREATE INDEX idx_keys_shard ON keys (guild_id, shard);
+    """,
+    # v6: per-key version, bumped by every write, for optimistic transactions
+    """
+    ALTER TABLE keys ADD COLUMN version INTEGER NOT NULL DEFAULT 0;
+    """,
+]
+
+KEY_COLUMNS = ('user_id', 'status', 'duration', 'created_at', 'expires_at', 'hwid')
+LOCATION_COLUMNS = ('keys_channel_id', 'customer_channel_id', 'customer_message_id')
+INSERT_SQL = f"INTO keys ({SELECT_COLUMNS}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+
+class KeyStore:
+    """Async data-access layer over a local SQLite database.
+
+    All queries run on a single worker thread so the connection is never
+    shared between threads and the event loop never blocks on disk I/O.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._conn = None
+        self._imported = set()  # Guilds known to be imported, skips the query
+        self._guild_locks = {}  # guild_id -> lock serializing that guild's transactions
+        self.index = KeyIndex()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='keystore')
+
+        self.transactions = 0
+        self.conflicts = 0
+        self.pending = 0  # Queries submitted to the worker thread and not finished yet
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        try:
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    # -- lifecycle --------------------------------------------------------
+
+    async def open(self):
+        """Open the database, apply pending migrations and build the index"""
+        if self._conn is None:
+            await self._run(self._open)
+            self.index.rebuild(await self._run(self._get_all_keys))
+
+    def _get_all_keys(self):
+        return self._select('ORDER BY rowid')
+
+    def _select(self, where, params=()):
+        cursor = self._conn.execute(f'SELECT {SELECT_COLUMNS} FROM keys {where}', params)
+        cursor.row_factory = None  # Plain tuples decode faster than sqlite3.Row
+        return decode_rows(cursor.fetchall())
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        for target, script in enumerate(MIGRATIONS[version:], start=version + 1):
+            with conn:
+                conn.executescript(script)
+                conn.execute(f'PRAGMA user_version = {target}')
+        self._conn = conn
+
+    async def close(self):
+        """Close the database connection"""
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=True)
+
+    # -- reads ------------------------------------------------------------
+
+    async def get_key(self, guild_id, key):
+        """Return a single KeyRecord, or None if the guild has no such key"""
+        return self.index.get(guild_id, key)
+
+    async def get_guild_keys(self, guild_id):
+        """Return all of a guild's keys in creation order, as {key: KeyRecord}"""
+        return await self._run(self._get_guild_keys, guild_id)
+
+    def _get_guild_keys(self, guild_id):
+        records = self._select('WHERE guild_id = ? ORDER BY rowid', (guild_id,))
+        return {record.key: record for record in records}
+
+    async def get_shard_keys(self, guild_id, shard):
+        """Return the keys rendered in one ledger shard, in creation order"""
+        return await self._run(self._get_shard_keys, guild_id, shard)
+
+    def _get_shard_keys(self, guild_id, shard):
+        records = self._select('WHERE guild_id = ? AND shard = ? ORDER BY rowid', (guild_id, shard))
+        return {record.key: record for record in records}
+
+    async def get_shards(self, guild_id):
+        """Return the shard numbers that currently hold keys"""
+        return await self._run(self._get_shards, guild_id)
+
+    def _get_shards(self, guild_id):
+        rows = self._conn.execute(
+            'SELECT DISTINCT shard FROM keys WHERE guild_id = ?', (guild_id,)
+        ).fetchall()
+        return {row['shard'] for row in rows}
+
+    async def get_user_keys(self, guild_id, user_id):
+        """Return all keys belonging to a specific user"""
+        return self.index.user_keys(guild_id, user_id)
+
+    # -- writes -----------------------------------------------------------
+
+    async def add_key(self, record):
+        """Insert a new KeyRecord; returns the shard it was placed in"""
+        added = await self._run(self._add_keys, record.guild_id, [record], 'INSERT')
+        self._index_added(added)
+        return added[0].shard
+
+    async def add_keys(self, guild_id, records):
+        """Insert many KeyRecords in a single transaction; returns the shards touched"""
+        added = await self._run(self._add_keys, guild_id, records, 'INSERT')
+        self._index_added(added)
+        return {record.shard for record in added}
+
+    def _index_added(self, records):
+        for record in records:
+            self.index.put(record)
+
+    def _add_keys(self, guild_id, records, verb):
+        with self._conn:
+            return self._insert_keys(guild_id, records, verb)
+
+    def _insert_keys(self, guild_id, records, verb):
+        # Fill the lowest shards first; a key keeps its shard for life
+        counts = dict(self._conn.execute(
+            'SELECT shard, COUNT(*) FROM keys WHERE guild_id = ? GROUP BY shard', (guild_id,)
+        ).fetchall())
+        shard = 0
+        added = []
+        for record in records:
+            while counts.get(shard, 0) >= KEYS_PER_SHARD:
+                shard += 1
+            counts[shard] = counts.get(shard, 0) + 1
+            added.append(record.replace(guild_id=guild_id, shard=shard, version=0))
+        self._conn.executemany(f'{verb} {INSERT_SQL}', [record.to_row() for record in added])
+        return added
+
+    async def update_key(self, guild_id, key, **fields):
+        """Update some columns of a key; returns its shard, or None if it doesn't exist"""
+        record = await self._run(self._update_key, guild_id, key, fields)
+        if record is None:
+            return None
+        self.index.put(record)
+        return record.shard
+
+    def _update_key(self, guild_id, key, fields):
+        with self._conn:
+            return self._update_row(guild_id, key, fields)
+
+    def _update_row(self, guild_id, key, fields):
+        unknown = set(fields) - set(KEY_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown key fields: {', '.join(sorted(unknown))}")
+        if 'status' in fields:
+            fields['status'] = int(KeyStatus(fields['status']))
+        assignments = ''.join(f'{name} = ?, ' for name in fields)
+        cursor = self._conn.execute(
+            f'UPDATE keys SET {assignments}version = version + 1 '
+            f'WHERE key = ? AND guild_id = ? RETURNING {SELECT_COLUMNS}',
+            (*fields.values(), key, guild_id)
+        )
+        cursor.row_factory = None
+        records = decode_rows(cursor.fetchall())
+        return records[0] if records else None
+
+    async def delete_key(self, guild_id, key):
+        """Delete a key; returns the shard it was in, or None if it doesn't exist"""
+        shard = await self._run(self._delete_key, guild_id, key)
+        if shard is not None:
+            self.index.remove(key)
+        return shard
+
+    def _delete_key(self, guild_id, key):
+        with self._conn:
+            return self._delete_row(guild_id, key)
+
+    def _delete_row(self, guild_id, key):
+        row = self._conn.execute(
+            'DELETE FROM keys WHERE key = ? AND guild_id = ? RETURNING shard', (key, guild_id)
+        ).fetchone()
+        return row['shard'] if row else None
+
+    async def expire_keys(self, keys):
+        """Flag keys as expired in one transaction; returns {guild_id: shards touched}"""
+        records = await self._run(self._expire_keys, keys)
+        touched = {}
+        for record in records:
+            self.index.put(record)
+            touched.setdefault(record.guild_id, set()).add(record.shard)
+        return touched
+
+    def _expire_keys(self, keys):
+        rows = []
+        with self._conn:
+            for key in keys:
+                cursor = self._conn.execute(
+                    f'UPDATE keys SET status = ?, version = version + 1 '
+                    f'WHERE key = ? AND status != ? RETURNING {SELECT_COLUMNS}',
+                    (KeyStatus.EXPIRED, key, KeyStatus.EXPIRED)
+                )
+                cursor.row_factory = None
+                rows += cursor.fetchall()
+        return decode_rows(rows)
+
+    # -- transactions -----------------------------------------------------
+
+    async def transaction(self, guild_id, fn, retries=5):
+        """Run ``fn(txn)`` and commit its writes atomically; returns the committed KeyTransaction
+
+        ``fn`` is a plain function that reads through the KeyTransaction and
+        buffers writes on it; its return value ends up in ``txn.result``.
+        Transactions of one guild run one at a time. If another writer
+        changed a key that ``fn`` read, ``fn`` runs again on the fresh state,
+        up to ``retries`` times before KeyConflict is raised.
+        """
+        lock = self._guild_locks.setdefault(guild_id, asyncio.Lock())
+        async with lock:
+            for attempt in range(retries + 1):
+                txn = KeyTransaction(self.index, guild_id)
+                txn.result = fn(txn)
+                if not txn.writes:
+                    return txn
+                try:
+                    added, updated, deleted = await self._run(self._commit, txn)
+                except KeyConflict as e:
+                    self.conflicts += 1
+                    # The index may not have caught up with the other writer yet
+                    if e.record is None:
+                        if self.index.get(guild_id, e.key) is not None:
+                            self.index.remove(e.key)
+                    else:
+                        self.index.put(e.record)
+                    if attempt == retries:
+                        raise
+                    continue
+
+                self.transactions += 1
+                for record in added + updated:
+                    self.index.put(record)
+                    txn.shards.add(record.shard)
+                for key, shard in deleted:
+                    self.index.remove(key)
+                    txn.shards.add(shard)
+                return txn
+
+    def _commit(self, txn):
+        with self._conn:
+            for key, version in txn.reads.items():
+                row = self._conn.execute(
+                    'SELECT version FROM keys WHERE key = ? AND guild_id = ?', (key, txn.guild_id)
+                ).fetchone()
+                if (row['version'] if row else None) != version:
+                    current = self._select('WHERE key = ? AND guild_id = ?', (key, txn.guild_id))
+                    raise KeyConflict(key, current[0] if current else None)
+            added = self._insert_keys(txn.guild_id, txn.adds, 'INSERT') if txn.adds else []
+            updated = []
+            for key, fields in txn.updates.items():
+                record = self._update_row(txn.guild_id, key, dict(fields))
+                if record is not None:
+                    updated.append(record)
+            deleted = []
+            for key in txn.deletes:
+                shard = self._delete_row(txn.guild_id, key)
+                if shard is not None:
+                    deleted.append((key, shard))
+        return added, updated, deleted
+
+    def stats(self):
+        """Store metrics"""
+        return {
+            'open': self._conn is not None,
+            'keys': len(self.index),
+            'pending_queries': self.pending,
+            'transactions': self.transactions,
+            'conflicts': self.conflicts
+        }
+
+    # -- legacy import ----------------------------------------------------
+
+    async def is_legacy_imported(self, guild_id):
+        """Whether the guild's old embed-based ledger has been imported"""
+        if guild_id in self._imported:
+            return True
+        if await self._run(self._is_legacy_imported, guild_id):
+            self._imported.add(guild_id)
+            return True
+        return False
+
+    def is_loaded(self, guild_id):
+        """Whether the guild's keys are known to be in the store and index (no I/O)"""
+        return guild_id in self._imported
+
+    def _is_legacy_imported(self, guild_id):
+        row = self._conn.execute(
+            'SELECT legacy_imported FROM guilds WHERE guild_id = ?', (guild_id,)
+        ).fetchone()
+        return bool(row and row['legacy_imported'])
+
+    async def import_legacy_keys(self, guild_id, records, keep_shards=False):
+        """Import KeyRecords parsed from the old embed ledger or a snapshot, once per guild
+
+        With keep_shards, records keep the shard they had (a snapshot restore),
+        instead of being packed into the lowest shards.
+        """
+        imported = await self._run(self._import_legacy_keys, guild_id, records, keep_shards)
+        self._index_added(imported.values())
+        self._imported.add(guild_id)
+
+    def _import_legacy_keys(self, guild_id, records, keep_shards):
+        with self._conn:
+            if keep_shards:
+                self._conn.executemany(f'INSERT OR IGNORE {INSERT_SQL}', [
+                    record.replace(guild_id=guild_id, version=0).to_row() for record in records
+                ])
+            else:
+                self._insert_keys(guild_id, records, 'INSERT OR IGNORE')
+            self._conn.execute(
+                'INSERT INTO guilds (guild_id, legacy_imported) VALUES (?, 1) '
+                'ON CONFLICT (guild_id) DO UPDATE SET legacy_imported = 1',
+                (guild_id,)
+            )
+        # Keys that already existed were skipped, so re-read what the guild holds now
+        return self._get_guild_keys(guild_id)
+
+    # -- guild locations --------------------------------------------------
+
+    async def get_guild_locations(self):
+        """Return the cached channel/message IDs of every guild"""
+        return await self._run(self._get_guild_locations)
+
+    def _get_guild_locations(self):
+        rows = self._conn.execute(
+            f"SELECT guild_id, {', '.join(LOCATION_COLUMNS)} FROM guilds"
+        ).fetchall()
+        return {row['guild_id']: {column: row[column] for column in LOCATION_COLUMNS} for row in rows}
+
+    async def set_guild_locations(self, guild_id, **ids):
+        """Persist some of a guild's channel/message IDs (None clears one)"""
+        await self._run(self._set_guild_locations, guild_id, ids)
+
+    def _set_guild_locations(self, guild_id, ids):
+        unknown = set(ids) - set(LOCATION_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown location fields: {', '.join(sorted(unknown))}")
+        assignments = ', '.join(f'{name} = excluded.{name}' for name in ids)
+        with self._conn:
+            self._conn.execute(
+                f"INSERT INTO guilds (guild_id, {', '.join(ids)}) VALUES (?{', ?' * len(ids)}) "
+                f"ON CONFLICT (guild_id) DO UPDATE SET {assignments}",
+                (guild_id, *ids.values())
+            )
+
+    async def get_ledger_messages(self):
+        """Return every guild's ledger message IDs as {guild_id: {shard: message_id}}"""
+        return await self._run(self._get_ledger_messages)
+
+    def _get_ledger_messages(self):
+        messages = {}
+        for row in self._conn.execute('SELECT guild_id, shard, message_id FROM ledger_messages'):
+            messages.setdefault(row['guild_id'], {})[row['shard']] = row['message_id']
+        return messages
+
+    async def set_ledger_message(self, guild_id, shard, message_id):
+        """Persist (or with None, clear) the message that renders a ledger shard"""
+        await self._run(self._set_ledger_message, guild_id, shard, message_id)
+
+    def _set_ledger_message(self, guild_id, shard, message_id):
+        with self._conn:
+            if message_id is None:
+                self._conn.execute(
+                    'DELETE FROM ledger_messages WHERE guild_id = ? AND shard = ?', (guild_id, shard)
+                )
+            else:
+                self._conn.execute(
+                    'INSERT INTO ledger_messages (guild_id, shard, message_id) VALUES (?, ?, ?) '
+                    'ON CONFLICT (guild_id, shard) DO UPDATE SET message_id = excluded.message_id',
+                    (guild_id, shard, message_id)
+                )
@@ -0,0 +1,127 @@
+"""Write-behind queue for the #keys ledger message.
+
+Every mutation used to edit the ledger message straight away, so a burst of
+commands ran into Discord's per-channel rate limit. LedgerWriter only marks
+the guild dirty; one flush per guild runs after a short window and renders
+whatever the store holds at that moment, so any number of mutations inside
+the window cost a single edit and the last edit always shows the latest state.
+Only the ledger shards (messages) that a mutation touched are re-rendered.
+"""
+import asyncio
+import time
+
+
+class LedgerWriter:
+    """Per-guild coalescing writer for ledger edits"""
+
+    def __init__(self, render, window=1.0, min_interval=1.0, retry_after=5.0):
+        self.render = render  # async render(guild, shards), reads the store and edits the shard messages
+        self.window = window  # How long mutations are collected before a flush
+        self.min_interval = min_interval  # Minimum time between two edits of one guild's ledger
+        self.retry_after = retry_after  # Delay before retrying a flush that hit a 429
+
+        self._pending = {}  # guild_id -> [guild, mutation count, dirty shards (None = all)]
+        self._tasks = {}  # guild_id -> scheduled flush task
+        self._locks = {}  # guild_id -> lock held while rendering
+        self._last_flush = {}  # guild_id -> time.monotonic() of the last edit
+        self._closed = False
+
+        self.mutations = 0
+        self.edits = 0
+        self.flushed_mutations = 0
+        self.errors = 0
+        self.rate_limit_waits = 0
+        self.rate_limit_wait_seconds = 0.0
+
+    def mark_dirty(self, guild, shard=None):
+        """Record a mutation of one shard (or all); the ledger is re-rendered after the window"""
+        self._add_pending(guild, 1, None if shard is None else {shard})
+        self.mutations += 1
+        if guild.id not in self._tasks:
+            self._tasks[guild.id] = asyncio.create_task(self._flush_later(guild.id))
+
+    async def flush(self, guild=None):
+        """Render now - one guild (even if nothing is pending) or everything pending"""
+        if guild is not None:
+            self._add_pending(guild, 0, None)
+            await self._flush(guild.id)
+        else:
+            await asyncio.gather(*(self._flush(guild_id) for guild_id in list(self._pending)))
+
+    async def close(self):
+        """Cancel scheduled flushes and write out everything still pending"""
+        self._closed = True
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.flush()
+
+    # -- internals --------------------------------------------------------
+
+    def _add_pending(self, guild, mutations, shards):
+        entry = self._pending.get(guild.id)
+        if entry is None:
+            self._pending[guild.id] = [guild, mutations, shards]
+            return
+        entry[1] += mutations
+        if entry[2] is not None:
+            entry[2] = None if shards is None else entry[2] | shards
+
+    async def _flush_later(self, guild_id):
+        try:
+            delay = self.window
+            while guild_id in self._pending:
+                await asyncio.sleep(delay)
+                wait = self._last_flush.get(guild_id, float('-inf')) + self.min_interval - time.monotonic()
+                if wait > 0:
+                    self._record_wait(wait)
+                    await asyncio.sleep(wait)
+                delay = self.retry_after if not await self._flush(guild_id) else self.window
+        finally:
+            self._tasks.pop(guild_id, None)
+
+    async def _flush(self, guild_id):
+        """Render one guild's pending mutations; returns False if rate limited"""
+        lock = self._locks.setdefault(guild_id, asyncio.Lock())
+        async with lock:
+            # Pop under the lock so a later flush always renders a later state
+            entry = self._pending.pop(guild_id, None)
+            if entry is None:
+                return True
+            guild, mutations, shards = entry
+            try:
+                await self.render(guild, shards)
+            except Exception as e:
+                if getattr(e, 'status', None) == 429:
+                    # Put the mutations back and let the scheduled flush retry
+                    self._record_wait(self.retry_after)
+                    self._add_pending(guild, mutations, shards)
+                    if guild_id not in self._tasks and not self._closed:
+                        self._tasks[guild_id] = asyncio.create_task(self._flush_later(guild_id))
+                    return False
+                self.errors += 1
+                print(f"Error updating keys message in {guild.name}: {str(e)}")
+            else:
+                self.edits += 1
+                self.flushed_mutations += mutations
+            finally:
+                self._last_flush[guild_id] = time.monotonic()
+        return True
+
+    def _record_wait(self, seconds):
+        self.rate_limit_waits += 1
+        self.rate_limit_wait_seconds += seconds
+
+    def stats(self):
+        """Writer metrics"""
+        return {
+            'mutations': self.mutations,
+            'edits': self.edits,
+            'mutations_per_edit': round(self.flushed_mutations / self.edits, 3) if self.edits else 0.0,
+            'queue_depth': sum(entry[1] for entry in list(self._pending.values())),
+            'dirty_guilds': len(self._pending),
+            'errors': self.errors,
+            'rate_limit_waits': self.rate_limit_waits,
+            'rate_limit_wait_seconds': round(self.rate_limit_wait_seconds, 3)
+        }
@@ -0,0 +1,67 @@
+"""Parser for the "Generated Keys" embed ledger.
+
+Keys used to live only in the ledger embed, as fields named after the key
+with values like ``User: <@id>\\nStatus: Used\\nDuration: 1 day``. The old
+parser read those lines by position, so a field without an Expires line
+lost its HWID, and reduced the status to ``"Used" in status_line``, so
+Expired keys came back as Unused. parse_field() reads each line by its label
+and maps the status by its exact name.
+"""
+from datetime import datetime
+
+from keyrecord import KeyRecord, KeyStatus, to_epoch
+
+STATUSES = {status.label: status for status in KeyStatus}
+
+
+def parse_field(name, value, guild_id):
+    """KeyRecord for one ledger field, or None if it isn't one"""
+    key = name.strip('`').strip()
+    fields = {}
+    for line in value.split('\n'):
+        label, sep, text = line.partition(': ')
+        if sep:
+            fields[label.strip('*')] = text.strip()
+
+    user = fields.get('User', '')
+    if not key or not (user.startswith('<@') and user.endswith('>')):
+        return None
+    try:
+        user_id = int(user[2:-1].lstrip('!'))
+    except ValueError:
+        return None
+
+    expires_at = None
+    if 'Expires' in fields:
+        try:
+            expires_at = to_epoch(datetime.fromisoformat(fields['Expires']))
+        except ValueError:
+            pass
+
+    return KeyRecord(
+        key,
+        guild_id,
+        user_id,
+        STATUSES.get(fields.get('Status'), KeyStatus.UNUSED),
+        fields.get('Duration', 'Unknown'),
+        expires_at=expires_at,
+        hwid=fields.get('HWID') or None
+    )
+
+
+def parse_embed(embed, guild_id):
+    """{key: KeyRecord} for every key field of a ledger embed"""
+    keys = {}
+    for field in embed.fields:
+        record = parse_field(field.name, field.value, guild_id)
+        if record is not None:
+            keys[record.key] = record
+    return keys
+
+
+def parse_message(message):
+    """{key: KeyRecord} from every embed of a ledger message"""
+    keys = {}
+    for embed in message.embeds:
+        keys.update(parse_embed(embed, message.guild.id))
+    return keys
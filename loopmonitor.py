@@ -0,0 +1,162 @@
+"""Event-loop lag measurement.
+
+Everything the bot does - gateway heartbeats, commands, the HTTP API - runs
+on one asyncio loop, so a single blocking call stalls all of it. A process
+can therefore be up while the bot is unresponsive, which a health check that
+only asks "is the bot logged in" can't see. LoopLagMonitor sleeps for a fixed
+interval in a background task and records how late it woke up: that delay is
+how long any other callback waited for the loop at the same moment.
+
+Lag says that the loop stalled, not what stalled it. StallWatchdog pings the
+loop from a separate thread, which keeps running while the loop is blocked;
+when a ping goes unanswered past a threshold it captures the loop thread's
+stack - the blocking call itself - and logs it with the name of the command,
+interaction or request that was running.
+"""
+import asyncio
+import sys
+import threading
+import time
+import traceback
+
+from metrics import stack_operation
+
+
+class LoopLagMonitor:
+    """Background task sampling how late the event loop runs a timer"""
+
+    def __init__(self, interval=0.5, smoothing=0.1):
+        self.interval = interval  # Seconds between samples
+        self.smoothing = smoothing  # Weight of the newest sample in the moving average
+
+        self.lag = 0.0  # Lag of the last sample, in seconds
+        self.average = 0.0  # Exponentially weighted moving average of the lag
+        self.max_lag = 0.0
+        self.samples = 0
+        self.last_sample = None  # time.monotonic() of the last sample
+        self._task = None
+
+    def start(self):
+        """Start sampling (call from inside the event loop)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name='loop-lag-monitor')
+
+    async def stop(self):
+        """Stop sampling"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.record(max(0.0, now - start - self.interval), now)
+
+    def record(self, lag, now):
+        self.lag = lag
+        self.average = lag if not self.samples else self.average + self.smoothing * (lag - self.average)
+        self.max_lag = max(self.max_lag, lag)
+        self.samples += 1
+        self.last_sample = now
+
+    def current_lag(self):
+        """Lag right now: the last sample, or longer if the next one is overdue"""
+        if self.last_sample is None:
+            return 0.0
+        overdue = time.monotonic() - self.last_sample - self.interval
+        return max(self.lag, overdue)
+
+    def stats(self):
+        """Monitor metrics, in seconds"""
+        return {
+            'running': self._task is not None and not self._task.done(),
+            'lag_seconds': round(self.current_lag(), 6),
+            'average_lag_seconds': round(self.average, 6),
+            'max_lag_seconds': round(self.max_lag, 6),
+            'samples': self.samples
+        }
+
+
+class StallWatchdog:
+    """Thread that logs the stack of any callback blocking the event loop for over ``threshold`` seconds"""
+
+    def __init__(self, threshold=0.5, interval=0.1):
+        self.threshold = threshold
+        self.interval = interval  # Seconds between pings while the loop is responsive
+
+        self.stalls = 0
+        self.stall_seconds = 0.0  # Total time spent stalled past detection
+        self.longest_stall = 0.0
+        self.last_operation = None
+        self._stalls_by_operation = {}
+        self._loop = None
+        self._loop_thread = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start watching the running loop (call from inside it)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='loop-stall-watchdog', daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        """Stop the watchdog thread"""
+        if self._thread is not None:
+            self._stop.set()
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            answered = threading.Event()
+            start = time.monotonic()
+            try:
+                self._loop.call_soon_threadsafe(answered.set)
+            except RuntimeError:
+                return  # Loop closed
+            if not answered.wait(self.threshold):
+                self._report(start)
+                while not answered.wait(self.interval):
+                    if self._stop.is_set():
+                        return
+                self._resolved(time.monotonic() - start)
+            self._stop.wait(self.interval)
+
+    def _report(self, start):
+        frame = sys._current_frames().get(self._loop_thread)
+        name = stack_operation(frame)
+        self.stalls += 1
+        self.last_operation = name
+        self._stalls_by_operation[name] = self._stalls_by_operation.get(name, 0) + 1
+        stack = ''.join(traceback.format_stack(frame)) if frame is not None else '  (stack unavailable)\n'
+        print(f"Event loop blocked for over {time.monotonic() - start:.2f}s in {name}, at:\n{stack}", end='')
+
+    def _resolved(self, duration):
+        self.stall_seconds += duration
+        self.longest_stall = max(self.longest_stall, duration)
+        print(f"Event loop resumed after {duration:.2f}s in {self.last_operation}")
+
+    def stalls_by_operation(self):
+        """{operation: stalls detected while it was running}"""
+        return dict(self._stalls_by_operation)
+
+    def stats(self):
+        """Watchdog metrics"""
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'stalls': self.stalls,
+            'stall_seconds': round(self.stall_seconds, 6),
+            'longest_stall_seconds': round(self.longest_stall, 6),
+            'last_operation': self.last_operation
+        }
@@ -1,37 +1,377 @@
 import discord
 from discord.ext import commands
 from discord import ui
-import random
-import string
 import os
-from datetime import datetime, timedelta, timezone
-import requests
-import threading
-from flask import Flask
+import json
+import asyncio
+import logging
+import math
+import csv
+import io
+import re
+import signal
+from datetime import datetime, timedelta
+from aiohttp import web
+from discord.webhook.async_ import async_context
+from clock import ClockService
+from embeds import EmbedRenderer
+from expiry import ExpirySweeper
+from fanout import FanOut
+from instrumentation import DiscordCallMetrics, HttpClientMetrics
+from keyformat import KeyFormat
+from keygen import KeyGenerator
+from keyrecord import KeyRecord, KeyStatus, to_epoch
+from keystore import KeyStore
+from ratelimit import TokenBucketLimiter
+from ledger import LedgerWriter
+from ledgerparser import parse_message
+from loopmonitor import LoopLagMonitor, StallWatchdog
+from metrics import Registry, Tracker, stats_collector
+from profiler import SamplingProfiler
+from resolver import GuildResolver
+from singleflight import SingleFlight
+from snapshot import SNAPSHOT_FILENAME, encode_snapshot, fetch_snapshot
+import validation
+from webserver import WebServer, request_params
+
+# Key store - the source of truth for all keys
+store = KeyStore()
+
+# Versioned key format with a check character; rejects mistyped keys without a lookup
+key_format = KeyFormat(
+    prefix=os.getenv('KEY_PREFIX', 'ASTRA'),
+    groups=int(os.getenv('KEY_GROUPS', '3')),
+    group_length=int(os.getenv('KEY_GROUP_LENGTH', '5'))
+)
+
+# Pool of unused random keys, checked against the store's index
+keygen = KeyGenerator(store.index, key_format)
+
+# Cached locations of each guild's keys/customer channels and messages
+resolver = GuildResolver(store)
+
+# Event-loop lag, sampled in the background for the health checks
+loop_monitor = LoopLagMonitor()
+
+# Logs the stack of anything blocking the event loop for longer than this many seconds
+stall_watchdog = StallWatchdog(threshold=float(os.getenv('LOOP_STALL_THRESHOLD', '0.5')))
+
+# Admin-triggered sampling of the event loop thread (!profile)
+profiler = SamplingProfiler()
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+MAX_PROFILE_SECONDS = 120
+
+# Memoized key embeds
+renderer = EmbedRenderer()
+
+# One shared legacy ledger load per guild, however many interactions need it at once
+legacy_loads = SingleFlight()
+
+# Rate limits: customer panel clicks and resets per user, validation per client IP and per key,
+# and batch lines per client IP, sized for a launcher fleet re-checking all of its keys in one request
+rate_limits = {
+    'interactions': TokenBucketLimiter(rate=0.2, burst=3),
+    'http_ip': TokenBucketLimiter(rate=20, burst=40),
+    'http_key': TokenBucketLimiter(rate=2, burst=10),
+    'http_batch': TokenBucketLimiter(rate=1000, burst=100_000)
+}
+
+
+# Prometheus metrics, served on /metrics
+registry = Registry()
+command_metrics = Tracker(registry, 'bot_commands', 'Prefix commands')
+interaction_metrics = Tracker(registry, 'bot_interactions', 'Button interactions')
+background_metrics = Tracker(registry, 'bot_background', 'Background jobs')
+http_metrics = Tracker(registry, 'http_requests', 'HTTP API requests')
+discord_metrics = DiscordCallMetrics(registry)
+http_client_metrics = HttpClientMetrics(registry)
+
+# UTC clock synced in the background, never blocks the event loop
+clock = ClockService(trace_configs=[http_client_metrics.trace_config()])
+
+
+class KeyBot(commands.Bot):
+    """Bot that owns the lifecycle of the key store, clock, expiry sweeper, ledger writer and web server"""
+
+    web_server = None  # Set before run() to serve the HTTP API on the bot's loop
+    shutdown = None  # close() task started by SIGTERM
+
+    async def setup_hook(self):
+        # Railway stops containers with SIGTERM, which run() doesn't handle; close() writes out pending ledger edits
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, self.terminate)
+        except NotImplementedError:
+            pass  # No Unix signals on Windows
+        
+        # Count and time every outbound Discord call (REST requests and interaction responses) and its rate-limit sleeps
+        discord_metrics.instrument_requests(self.http)
+        discord_metrics.instrument_requests(async_context.get())
+        discord_metrics.instrument_rate_limits()
+        rate_limit_filter = discord_metrics.rate_limit_filter()
+        for logger in ('discord.http', 'discord.webhook.async_'):
+            logging.getLogger(logger).addFilter(rate_limit_filter)
+        
+        loop_monitor.start()
+        stall_watchdog.start()
+        await store.open()
+        await resolver.load()
+        keygen.start()
+        clock.start()
+        sweeper.start()
+        if self.web_server:
+            await self.web_server.start()
+
+    def terminate(self):
+        if self.shutdown is None:
+            print("Received SIGTERM, shutting down")
+            self.shutdown = asyncio.create_task(self.close(), name='shutdown')
+
+    async def invoke(self, ctx):
+        if ctx.command is None:
+            return await super().invoke(ctx)
+        await command_metrics.run(ctx.command.qualified_name, super().invoke(ctx), failed=lambda: ctx.command_failed)
+
+    async def close(self):
+        # Shutdown may block the loop on purpose (joining the store's thread)
+        await stall_watchdog.stop()
+        if self.web_server:
+            await self.web_server.stop()
+        # Write out pending ledger edits, then the snapshot they leave behind, while the connection is still open
+        await ledger.close()
+        await snapshots.close()
+        await super().close()
+        await sweeper.stop()
+        await clock.stop()
+        await keygen.stop()
+        await store.close()
+        await loop_monitor.stop()
+
 
 # Bot configuration
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix='!', intents=intents)
+bot = KeyBot(command_prefix='!', intents=intents)
 
 # Bot token - get from environment variable
 BOT_TOKEN = os.getenv('BOT_TOKEN')
 
-# Global variables to store message info
-keys_message_id = None
-keys_channel_id = None
+# Global variables
 user_reset_times = {}  # Track when users last reset HWID
 
-# Railway-optimized Flask server for health checks
-app = Flask(__name__)
+# Railway health checks and the key validation API, served by bot.web_server
+routes = web.RouteTableDef()
+
+@routes.get('/')
+async def home(request):
+    return web.Response(text="Discord Bot is running on Railway!")
+
+@web.middleware
+async def track_http_requests(request, handler):
+    resource = request.match_info.route.resource
+    return await http_metrics.run(resource.canonical if resource else 'unmatched', handler(request))
+
+@routes.get('/metrics')
+async def metrics(request):
+    return web.Response(text=registry.render(), content_type='text/plain', charset='utf-8')
+
+# Event-loop lag (seconds) past which the bot is not ready / must be restarted
+READY_MAX_LOOP_LAG = 1.0
+LIVE_MAX_LOOP_LAG = 10.0
+
+def gateway_state():
+    """Connection state of the Discord gateway websocket"""
+    if bot.is_closed():
+        return "closed"
+    if bot.ws is None or not bot.ws.open:
+        return "disconnected"
+    return "connected" if bot.is_ready() else "connecting"
+
+def liveness():
+    """Failed checks that mean the process should be restarted"""
+    failed = []
+    if bot.is_closed():
+        failed.append("bot_closed")
+    if loop_monitor.current_lag() > LIVE_MAX_LOOP_LAG:
+        failed.append("event_loop_blocked")
+    return failed
+
+def readiness():
+    """Failed checks that mean the bot can't serve commands or validations right now"""
+    failed = liveness()
+    if gateway_state() != "connected":
+        failed.append("gateway_not_connected")
+    if not math.isfinite(bot.latency):
+        failed.append("no_gateway_heartbeat")
+    if not store.stats()['open']:
+        failed.append("store_closed")
+    elif not all(store.is_loaded(guild.id) or guild.id in keys_load_errors for guild in bot.guilds):
+        # The validation API answers from the index, so it would call unloaded guilds' keys invalid;
+        # guilds that can never load (no access to #keys) are reported in /health instead of failing every deploy
+        failed.append("keys_not_loaded")
+    if loop_monitor.current_lag() > READY_MAX_LOOP_LAG:
+        failed.append("event_loop_lagging")
+    return failed
+
+def health_response(failed):
+    return web.json_response({
+        "status": "unhealthy" if failed else "healthy",
+        "failed_checks": failed
+    }, status=503 if failed else 200)
+
+@routes.get('/health/live')
+async def health_live(request):
+    return health_response(liveness())
+
+@routes.get('/health/ready')
+async def health_ready(request):
+    return health_response(readiness())
+
+@routes.get('/health')
+async def health(request):
+    """Readiness plus the state behind it"""
+    failed = readiness()
+    latency = bot.latency
+    return web.json_response({
+        "status": "unhealthy" if failed else "healthy",
+        "failed_checks": failed,
+        "gateway": {
+            "state": gateway_state(),
+            "latency_seconds": round(latency, 6) if math.isfinite(latency) else None,
+            "guilds": len(bot.guilds)
+        },
+        "event_loop": loop_monitor.stats(),
+        "stall_watchdog": stall_watchdog.stats(),
+        "key_store": store.stats(),
+        "keys_load_errors": {
+            str(guild_id): error for guild_id, error in keys_load_errors.items() if not store.is_loaded(guild_id)
+        },
+        "key_generator": keygen.stats(),
+        "ledger_writer": ledger.stats(),
+        "snapshot_writer": snapshots.stats(),
+        "caches": {
+            "embed_fields": renderer.stats(),
+            "guild_locations": resolver.stats(),
+            "legacy_loads": legacy_loads.stats(),
+            "key_filter": store.index.filter.stats()
+        },
+        "clock": clock.status(),
+        "rate_limits": {name: limiter.stats() for name, limiter in rate_limits.items()}
+    }, status=503 if failed else 200)
+
+def client_ip(request):
+    """The caller's address; Railway's proxy appends it to X-Forwarded-For"""
+    forwarded = request.headers.get('X-Forwarded-For')
+    return forwarded.split(',')[-1].strip() if forwarded else request.remote
+
+def over_limit(limiter, key):
+    """Seconds until key may try again if it is over its limit, else None"""
+    if limiter.allow(key):
+        return None
+    return limiter.retry_after(key)
+
+def rate_limited(limiter, key):
+    """A 429 response if key is over its limit, else None"""
+    retry_after = over_limit(limiter, key)
+    if retry_after is None:
+        return None
+    return web.json_response(
+        {'valid': False, 'error': 'rate_limited', 'retry_after': round(retry_after, 2)},
+        status=429,
+        headers={'Retry-After': str(max(1, round(retry_after)))}
+    )
+
+@routes.route('*', '/api/v1/validate')
+async def validate_key(request):
+    """Validate key + HWID for the login client, binding the HWID on first use"""
+    limited = rate_limited(rate_limits['http_ip'], client_ip(request))
+    if limited:
+        return limited
+    params = await request_params(request)
+    key, hwid = params.get('key'), params.get('hwid')
+    
+    # Per-key limit stops one key being hammered from many addresses
+    if isinstance(key, str):
+        limited = rate_limited(rate_limits['http_key'], key)
+        if limited:
+            return limited
+    
+    # Answered from the in-memory index; only a first use writes to the store
+    result = validation.validate(store.index, key_format, key, hwid, get_utc_time().timestamp())
+    if result is None:
+        result = await bind_key_hwid(key, hwid)
+    status, body = result
+    return web.json_response(body, status=status)
+
+# Verdicts written per chunk of a batch response
+BATCH_CHUNK_LINES = 500
+# Lines accepted per batch request; every line also costs one token of the caller's batch limit
+BATCH_MAX_LINES = 100_000
 
-@app.route('/')
-def home():
-    return "Discord Bot is running on Railway!"
+@routes.post('/api/v1/validate/batch')
+async def validate_keys_batch(request):
+    """Validate an NDJSON stream of {"key", "hwid"} objects, streaming back one verdict line per input line
 
-@app.route('/health')
-def health():
-    return {"status": "healthy", "bot": "online"}
+    Each line is charged to the caller's batch limit, which has room for a
+    whole fleet's keys, and to the key's own limit like a single validation,
+    so a batch is no way around the per-key limit; lines over either limit
+    get a rate_limited verdict.
+    """
+    ip = client_ip(request)
+    limited = rate_limited(rate_limits['http_ip'], ip)
+    if limited:
+        return limited
+    response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+    await response.prepare(request)
+    
+    # Lines are read, validated and written in chunks, so memory stays bounded for any batch size
+    chunk = []
+    lines = 0
+    now = get_utc_time().timestamp()
+    async for line in request.content:
+        if not line.strip():
+            continue
+        lines += 1
+        if lines > BATCH_MAX_LINES:
+            chunk.append(json.dumps({'valid': False, 'error': 'batch_too_large', 'max_lines': BATCH_MAX_LINES}))
+            break
+        try:
+            item = json.loads(line)
+            key, hwid = item.get('key'), item.get('hwid')
+        except (ValueError, AttributeError):
+            chunk.append('{"valid": false, "error": "invalid_json"}')
+        else:
+            retry_after = over_limit(rate_limits['http_batch'], ip)
+            if retry_after is None and isinstance(key, str):
+                retry_after = over_limit(rate_limits['http_key'], key)
+            if retry_after is not None:
+                chunk.append(json.dumps(
+                    {'key': key, 'valid': False, 'error': 'rate_limited', 'retry_after': round(retry_after, 2)}
+                ))
+            else:
+                result = validation.validate(store.index, key_format, key, hwid, now) or await bind_key_hwid(key, hwid)
+                chunk.append(json.dumps({'key': key, **result[1]}))
+        
+        if len(chunk) >= BATCH_CHUNK_LINES:
+            await response.write(('\n'.join(chunk) + '\n').encode())
+            chunk.clear()
+            now = get_utc_time().timestamp()
+    
+    if chunk:
+        await response.write(('\n'.join(chunk) + '\n').encode())
+    await response.write_eof()
+    return response
+
+async def bind_key_hwid(key, hwid):
+    """Bind an unbound key to a HWID, then validate again"""
+    record = store.index.find(key)
+    if record is not None:
+        txn = await store.transaction(record.guild_id, lambda txn: validation.bind_hwid(txn, key, hwid))
+        guild = bot.get_guild(record.guild_id)
+        if guild:
+            for shard in txn.shards:
+                ledger.mark_dirty(guild, shard)
+    return validation.validate(store.index, key_format, key, hwid, get_utc_time().timestamp()) or (
+        409, {'valid': False, 'error': 'not_bound'})
 
 
 class CustomerKeyView(ui.View):
@@ -42,72 +382,27 @@ class CustomerKeyView(ui.View):
         self.user_id = user_id  # 0 means anyone can use it
     
     @ui.button(label="Fetch Key", style=discord.ButtonStyle.secondary, emoji="☁️")
+    @interaction_metrics('fetch_key')
     async def fetch_key_button(self, interaction: discord.Interaction, button: ui.Button):
         """Handle Fetch Key button click"""
         if self.user_id != 0 and interaction.user.id != self.user_id:
             await interaction.response.send_message("This interface is not for you!", ephemeral=True)
             return
         
+        if not rate_limits['interactions'].allow(interaction.user.id):
+            await interaction.response.send_message(slow_down_message(interaction.user.id), ephemeral=True)
+            return
+        
         try:
-            # Use the same logic as login.py to find keys
-            keys_channel = await find_keys_channel(interaction.guild)
-            if not keys_channel:
-                await interaction.response.send_message("No keys channel found!", ephemeral=True)
-                return
-            
-            keys_message = await find_keys_message(keys_channel)
-            if not keys_message:
-                await interaction.response.send_message("No keys message found!", ephemeral=True)
-                return
-            
-            # Extract keys from the embed using the same function as login.py
-            keys = extract_keys_from_embed(keys_message.embeds[0])
-            
             # Get user's keys
-            user_keys = get_user_keys(keys, interaction.user.id)
+            user_keys = await get_user_keys(interaction.guild, interaction.user.id)
             
             if not user_keys:
                 await interaction.response.send_message("You don't have any keys!", ephemeral=True)
                 return
             
             # Create embed with user's keys
-            embed = discord.Embed(
-                title="🔑 Your Authentication Keys",
-                color=0x0099ff,
-                timestamp=get_utc_time()
-            )
-            
-            for key, data in user_keys.items():
-                status = "Used" if data['used'] else "Unused"
-                duration = data.get('duration', 'Unknown')
-                expires_at = data.get('expires_at')
-                hwid = data.get('hwid')
-                
-                # Check if key is expired
-                if expires_at and not data['used']:
-                    try:
-                        expire_time = datetime.fromisoformat(expires_at)
-                        if get_utc_time() > expire_time:
-                            status = "Expired"
-                    except:
-                        pass
-                
-                value_text = f"**Status:** {status}\n**Duration:** {duration}"
-                if expires_at and status != "Expired":
-                    try:
-                        expire_time = datetime.fromisoformat(expires_at)
-                        value_text += f"\n**Expires:** {expire_time.strftime('%Y-%m-%d %H:%M:%S')}"
-                    except:
-                        pass
-                
-                if hwid:
-                    value_text += f"\n**HWID:** `{hwid[:8]}...`"
-                
-                embed.add_field(
-                    name=f"`{key}`",
-                    value=value_text,
-                    inline=True
-                )
+            embed = renderer.user_keys_embed(user_keys, get_utc_time())
             
             await interaction.response.send_message(embed=embed, ephemeral=True)
             
@@ -115,130 +410,66 @@ class CustomerKeyView(ui.View):
             await interaction.response.send_message(f"Error loading your keys: {str(e)}", ephemeral=True)
     
     @ui.button(label="Reset HWID", style=discord.ButtonStyle.secondary, emoji="🔄")
+    @interaction_metrics('reset_hwid')
     async def reset_hwid_button(self, interaction: discord.Interaction, button: ui.Button):
         """Handle Reset HWID button click"""
         if self.user_id != 0 and interaction.user.id != self.user_id:
             await interaction.response.send_message("This interface is not for you!", ephemeral=True)
             return
         
-        try:
-            # Use the same logic as login.py to find keys
-            keys_channel = await find_keys_channel(interaction.guild)
-            if not keys_channel:
-                await interaction.response.send_message("No keys channel found!", ephemeral=True)
-                return
-            
-            keys_message = await find_keys_message(keys_channel)
-            if not keys_message:
-                await interaction.response.send_message("No keys message found!", ephemeral=True)
-                return
-            
-            # Extract keys from the embed using the same function as login.py
-            keys = extract_keys_from_embed(keys_message.embeds[0])
-            
+        if not rate_limits['interactions'].allow(interaction.user.id):
+            await interaction.response.send_message(slow_down_message(interaction.user.id), ephemeral=True)
+            return
+        
+        def reset(txn):
             # Get user's keys
-            user_keys = get_user_keys(keys, interaction.user.id)
+            user_keys = txn.user_keys(interaction.user.id)
             
             if not user_keys:
-                await interaction.response.send_message("You don't have any keys!", ephemeral=True)
-                return
+                return "You don't have any keys!"
             
             # Check if user can reset (once per day)
             if not can_user_reset_hwid(interaction.user.id):
                 last_reset = datetime.fromisoformat(user_reset_times[interaction.user.id])
                 next_reset = last_reset + timedelta(days=1)
-                await interaction.response.send_message(f"⏰ You can reset your HWID again at: **{next_reset.strftime('%Y-%m-%d %H:%M:%S')} UTC**", ephemeral=True)
-                return
+                return f"⏰ You can reset your HWID again at: **{next_reset.strftime('%Y-%m-%d %H:%M:%S')} UTC**"
             
             # Find a used key to reset
-            used_keys = [key for key, data in user_keys.items() if data['used']]
+            used_keys = [key for key, record in user_keys.items() if record.used]
             if not used_keys:
-                await interaction.response.send_message("ℹ️ You don't have any used keys to reset!", ephemeral=True)
-                return
+                return "ℹ️ You don't have any used keys to reset!"
             
             # Reset the first used key
             key_to_reset = used_keys[0]
-            key_data = keys[key_to_reset]
+            key_data = user_keys[key_to_reset]
             
             # Verify key validity like login.py does
-            expires_at = key_data.get('expires_at')
-            if expires_at:
-                try:
-                    expire_time = datetime.fromisoformat(expires_at)
-                    if get_utc_time() > expire_time:
-                        await interaction.response.send_message("❌ Key has expired!", ephemeral=True)
-                        return
-                except:
-                    pass
+            if key_data.expired:
+                return "❌ Key has expired!"
             
             # Reset HWID and used status
-            keys[key_to_reset]['hwid'] = None
-            keys[key_to_reset]['used'] = False
-            
-            # Mark user as having reset
-            mark_user_reset_hwid(interaction.user.id)
-            
-            # Create new embed with updated keys (same as login.py mark_key_as_used)
-            embed = discord.Embed(
-                title="Generated Keys",
-                color=0x0099ff,
-                timestamp=keys_message.embeds[0].timestamp
-            )
-            
-            for key_name, data in keys.items():
-                status = "Used" if data['used'] else "Unused"
-                duration = data.get('duration', 'Unknown')
-                expires_at = data.get('expires_at')
-                hwid = data.get('hwid')
-                
-                # Check if key is expired
-                if expires_at and not data['used']:
-                    try:
-                        expire_time = datetime.fromisoformat(expires_at)
-                        if get_utc_time() > expire_time:
-                            status = "Expired"
-                    except:
-                        pass
-                
-                value_text = f"User: <@{data['user_id']}>\nStatus: {status}\nDuration: {duration}"
-                if expires_at and status != "Expired":
-                    try:
-                        expire_time = datetime.fromisoformat(expires_at)
-                        value_text += f"\nExpires: {expire_time.strftime('%Y-%m-%d %H:%M:%S')}"
-                    except:
-                        pass
-                
-                if hwid:
-                    value_text += f"\nHWID: {hwid}"
-                
-                embed.add_field(
-                    name=f"`{key_name}`",
-                    value=value_text,
-                    inline=True
-                )
-            
-            embed.set_footer(text=f"Total Keys: {len(keys)}")
-            
-            # Update the message
-            await keys_message.edit(embed=embed)
+            txn.update(key_to_reset, status=KeyStatus.UNUSED, hwid=None)
+            return f"✅ **HWID Reset Successful!**\nKey `{key_to_reset}` has been reset and can now be used again on any device."
+        
+        try:
+            txn = await transact(interaction.guild, reset)
+            if txn.writes:
+                # Mark user as having reset
+                mark_user_reset_hwid(interaction.user.id)
             
-            await interaction.response.send_message(f"✅ **HWID Reset Successful!**\nKey `{key_to_reset}` has been reset and can now be used again on any device.", ephemeral=True)
+            await interaction.response.send_message(txn.result, ephemeral=True)
             
         except Exception as e:
             await interaction.response.send_message(f"❌ Error resetting HWID: {str(e)}", ephemeral=True)
 
+def slow_down_message(user_id):
+    """Reply for a user who is over the interaction rate limit"""
+    retry_after = rate_limits['interactions'].retry_after(user_id)
+    return f"⏳ Slow down! Try again in {max(1, round(retry_after))} seconds."
+
 def get_utc_time():
-    """Get current UTC time from online source"""
-    try:
-        response = requests.get('http://worldtimeapi.org/api/timezone/UTC', timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            return datetime.fromisoformat(data['datetime'].replace('Z', '+00:00'))
-    except:
-        pass
-    
-    # Fallback to system UTC time if online fails
-    return datetime.now(timezone.utc)
+    """Get current UTC time (system clock corrected by the last online sync)"""
+    return clock.now()
 
 def can_user_reset_hwid(user_id):
     """Check if user can reset HWID (once per day)"""
@@ -259,247 +490,306 @@ def mark_user_reset_hwid(user_id):
     global user_reset_times
     user_reset_times[user_id] = get_utc_time().isoformat()
 
-def get_user_keys(keys, user_id):
-    """Get all keys belonging to a specific user"""
-    user_keys = {}
-    for key, data in keys.items():
-        if data['user_id'] == user_id:
-            user_keys[key] = data
-    return user_keys
-
-def extract_keys_from_embed(embed):
-    """Extract keys from Discord embed"""
-    keys = {}
-    if embed and embed.fields:
-        for field in embed.fields:
-            key_name = field.name.strip('`')
-            # Extract user ID and status from field value
-            lines = field.value.split('\n')
-            user_line = lines[0]  # "User: <@123456789>"
-            status_line = lines[1]  # "Status: Used/Unused"
-            
-            # Extract user ID from mention
+async def import_legacy_keys(guild):
+    """Import keys from the old "Generated Keys" embed into the store (once per guild)"""
+    # After the import, the store's index is updated by every write, so the result never goes stale
+    await legacy_loads.load(guild.id, lambda: _import_legacy_keys(guild))
+
+async def _import_legacy_keys(guild):
+    """Restore the guild's keys from the ledger snapshot, or import them from the ledger embeds
+
+    Runs when the store has no keys for the guild yet: on first start, and
+    after a redeploy wiped the disk. Returns (None, API calls made).
+    """
+    if await store.is_legacy_imported(guild.id):
+        return None, 0
+    
+    api_calls = 0
+    records = []
+    pages = {}
+    keys_channel = await resolver.keys_channel(guild)
+    if keys_channel:
+        misses = resolver.misses
+        keys_message = await resolver.keys_message(keys_channel)
+        api_calls += resolver.misses - misses  # A cache miss pages through the channel history
+        if keys_message and not isinstance(keys_message, discord.Message):
+            # Cached partial message - fetch it once to read the embed
+            api_calls += 1
             try:
-                user_id = int(user_line.split('<@')[1].split('>')[0])
-                
-                # Determine if key is used
-                used = "Used" in status_line
-                
-                # Extract duration and expiration info
-                duration_text = "Unknown"
-                expires_at = None
-                if len(lines) >= 3:
-                    duration_line = lines[2]  # "Duration: 1 hour"
-                    if "Duration:" in duration_line:
-                        duration_text = duration_line.split("Duration: ")[1]
-                    if len(lines) >= 4:
-                        expires_line = lines[3]  # "Expires: 2024-01-01 12:00:00"
-                        if "Expires:" in expires_line:
-                            try:
-                                expires_str = expires_line.split("Expires: ")[1]
-                                expires_at = datetime.fromisoformat(expires_str).isoformat()
-                            except:
-                                pass
-                
-                # Extract HWID info
-                hwid = None
-                if len(lines) >= 5:
-                    hwid_line = lines[4]  # "HWID: abc123..."
-                    if "HWID:" in hwid_line:
-                        hwid = hwid_line.split("HWID: ")[1]
-                
-                keys[key_name] = {
-                    'user_id': user_id,
-                    'used': used,
-                    'duration': duration_text,
-                    'expires_at': expires_at,
-                    'hwid': hwid
-                }
-            except:
-                continue
+                keys_message = await keys_message.fetch()
+            except discord.NotFound:
+                await resolver.forget_message(guild.id, keys_message.id)
+                keys_message = None
+        snapshot = next(
+            (attachment for attachment in keys_message.attachments if attachment.filename == SNAPSHOT_FILENAME), None
+        ) if keys_message else None
+        if snapshot:
+            api_calls += 1
+            try:
+                decoder, records = await background_metrics.run('snapshot_fetch', fetch_snapshot(
+                    snapshot.url, guild.id, trace_configs=[http_client_metrics.trace_config()]
+                ))
+            except Exception as e:
+                # The embeds may hold only part of the keys, and the next snapshot would overwrite this one
+                # with that part; fail instead, nothing is cached and load_all_guild_keys retries
+                raise RuntimeError(f"Couldn't restore the key snapshot: {str(e)}") from e
+            await store.import_legacy_keys(guild.id, records, keep_shards=True)
+            for shard, message_id in decoder.ledger_messages().items():
+                await resolver.remember_ledger_message(guild.id, shard, message_id)
+            print(f"Restored {len(records)} keys from the ledger snapshot in {guild.name}")
+            return None, api_calls
+        
+        # No snapshot yet: the keys are spread over every page of the ledger
+        misses = resolver.misses
+        pages = await resolver.ledger_pages(keys_channel)
+        api_calls += resolver.misses - misses
+        for message in pages.values():
+            records += parse_message(message).values()
+        # Importing a partial or empty set would mark the guild imported and post it over the real ledger
+        if pages and 0 not in pages:
+            raise RuntimeError(f"Found {len(pages)} ledger pages in #keys but not the first one")
+        if not records and any(message.embeds[0].fields for message in pages.values()):
+            raise RuntimeError(f"Found {len(pages)} ledger pages in #keys but couldn't read their keys")
     
-    return keys
+    await store.import_legacy_keys(guild.id, records)
+    if records:
+        for shard, message in pages.items():
+            await resolver.remember_ledger_message(guild.id, shard, message.id)
+        # The store shards the keys its own way; re-render every page from it and attach a snapshot
+        ledger.mark_dirty(guild)
+        print(f"Imported {len(records)} keys from the #keys embeds in {guild.name}")
+    return None, api_calls
 
-async def find_keys_channel(guild):
-    """Find the keys channel in the server"""
-    for channel in guild.channels:
-        if channel.name.lower() == 'keys' and isinstance(channel, discord.TextChannel):
-            return channel
-    return None
+async def get_user_keys(guild, user_id):
+    """Get all keys belonging to a specific user"""
+    await import_legacy_keys(guild)
+    return await store.get_user_keys(guild.id, user_id)
 
-async def find_keys_message(channel):
-    """Find the keys message in the channel"""
-    async for message in channel.history(limit=50):
-        if message.embeds and message.embeds[0].title == "Generated Keys":
-            return message
-    return None
+async def get_key(guild, key):
+    """Get a single key's KeyRecord, or None if it doesn't exist"""
+    await import_legacy_keys(guild)
+    return await store.get_key(guild.id, key)
 
-async def load_keys_from_discord(keys_channel):
-    """Load keys from Discord message"""
-    keys = {}
-    global keys_message_id
-    
-    if keys_message_id:
-        try:
-            message = await keys_channel.fetch_message(keys_message_id)
-            # Parse keys from the embed fields
-            if message.embeds:
-                embed = message.embeds[0]
-                for field in embed.fields:
-                    key_name = field.name.strip('`')
-                    # Extract user ID and status from field value
-                    lines = field.value.split('\n')
-                    user_line = lines[0]  # "User: <@123456789>"
-                    status_line = lines[1]  # "Status: Used/Unused"
-                    
-                    # Extract user ID from mention
-                    user_id = int(user_line.split('<@')[1].split('>')[0])
-                    
-                    # Determine if key is used
-                    used = "Used" in status_line
-                    
-                    # Extract duration and expiration info
-                    duration_text = "Unknown"
-                    expires_at = None
-                    hwid = None
-                    if len(lines) >= 3:
-                        duration_line = lines[2]  # "Duration: 1 hour"
-                        if "Duration:" in duration_line:
-                            duration_text = duration_line.split("Duration: ")[1]
-                        if len(lines) >= 4:
-                            expires_line = lines[3]  # "Expires: 2024-01-01 12:00:00"
-                            if "Expires:" in expires_line:
-                                try:
-                                    expires_str = expires_line.split("Expires: ")[1]
-                                    expires_at = datetime.fromisoformat(expires_str).isoformat()
-                                except:
-                                    pass
-                        if len(lines) >= 5:
-                            hwid_line = lines[4]  # "HWID: abc123..."
-                            if "HWID:" in hwid_line:
-                                hwid = hwid_line.split("HWID: ")[1]
-                    
-                    keys[key_name] = {
-                        'user_id': user_id,
-                        'used': used,
-                        'duration': duration_text,
-                        'expires_at': expires_at,
-                        'hwid': hwid
-                    }
-        except:
-            pass
-    
-    return keys
+async def transact(guild, fn):
+    """Run fn(txn) as one key transaction and queue re-renders of the shards it touched"""
+    await import_legacy_keys(guild)
+    txn = await store.transaction(guild.id, fn)
+    for shard in txn.shards:
+        ledger.mark_dirty(guild, shard)
+    return txn
 
+async def update_keys_message(guild, shards=None):
+    """Render the guild's keys from the store into the ledger messages
 
-async def update_keys_message(ctx, keys):
-    """Update the keys message in Discord"""
-    global keys_message_id, keys_channel_id
+    Each shard of the ledger is its own message; only the given shards are
+    re-rendered (all of them if shards is None). The snapshot on the first
+    message is refreshed separately, on the slower snapshot schedule.
+    """
+    await import_legacy_keys(guild)
     
     # Find or create the keys channel
-    keys_channel = None
-    for channel in ctx.guild.channels:
-        if channel.name.lower() == 'keys' and isinstance(channel, discord.TextChannel):
-            keys_channel = channel
-            break
-    
+    keys_channel = await resolver.keys_channel(guild)
     if not keys_channel:
         # Create keys channel if it doesn't exist
-        keys_channel = await ctx.guild.create_text_channel('keys')
+        keys_channel = await guild.create_text_channel('keys')
+        await resolver.remember(guild.id, keys_channel_id=keys_channel.id)
     
-    # Create embed with all keys
-    embed = discord.Embed(
-        title="Generated Keys",
-        color=0x0099ff,
-        timestamp=datetime.now()
-    )
+    if shards is None:
+        shards = await store.get_shards(guild.id) | resolver.ledger_shards(guild.id)
+    if 0 not in resolver.ledger_shards(guild.id):
+        # The first message carries the snapshot, so it has to exist
+        shards = set(shards) | {0}
     
-    if keys:
-        for key, data in keys.items():
-            status = "Used" if data['used'] else "Unused"
-            duration = data.get('duration', 'Unknown')
-            expires_at = data.get('expires_at')
-            
-            # Check if key is expired
-            if expires_at and not data['used']:
-                try:
-                    expire_time = datetime.fromisoformat(expires_at)
-                    if get_utc_time() > expire_time:
-                        status = "Expired"
-                except:
-                    pass
-            
-            value_text = f"User: <@{data['user_id']}>\nStatus: {status}\nDuration: {duration}"
-            if expires_at and status != "Expired":
-                try:
-                    expire_time = datetime.fromisoformat(expires_at)
-                    value_text += f"\nExpires: {expire_time.strftime('%Y-%m-%d %H:%M:%S')}"
-                except:
-                    pass
-            
-            hwid = data.get('hwid')
-            if hwid:
-                value_text += f"\nHWID: {hwid}"
-            
-            embed.add_field(
-                name=f"`{key}`",
-                value=value_text,
-                inline=True
-            )
-    else:
-        embed.description = "No keys have been generated yet."
+    for shard in sorted(shards):
+        keys = await store.get_shard_keys(guild.id, shard)
+        embed = renderer.keys_embed(keys, shard)
+        
+        # Update existing message or create new one
+        message = await resolver.keys_message(keys_channel, shard)
+        if message:
+            try:
+                await message.edit(embed=embed)
+                continue
+            except discord.NotFound:
+                # Message doesn't exist anymore, create new one
+                await resolver.forget_message(guild.id, message.id)
+        
+        message = await keys_channel.send(embed=embed)
+        await resolver.remember_ledger_message(guild.id, shard, message.id)
     
-    embed.set_footer(text=f"Total Keys: {len(keys)}")
+    snapshots.mark_dirty(guild)
+
+async def update_keys_snapshot(guild):
+    """Attach a fresh snapshot of every key in the guild to the first ledger message"""
+    keys_channel = await resolver.keys_channel(guild)
+    message = await resolver.keys_message(keys_channel, 0) if keys_channel else None
+    if not message:
+        # Rendering the ledger creates the first message and asks for a snapshot again
+        ledger.mark_dirty(guild, 0)
+        return
     
-    # Update existing message or create new one
-    if keys_message_id and keys_channel_id:
-        try:
-            message = await keys_channel.fetch_message(keys_message_id)
-            await message.edit(embed=embed)
-        except:
-            # Message doesn't exist anymore, create new one
-            message = await keys_channel.send(embed=embed)
-            keys_message_id = message.id
-            keys_channel_id = message.channel.id
-    else:
-        # Create new message
-        message = await keys_channel.send(embed=embed)
-        keys_message_id = message.id
-        keys_channel_id = message.channel.id
+    records = list((await store.get_guild_keys(guild.id)).values())
+    data = await asyncio.to_thread(encode_snapshot, guild.id, records, resolver.ledger_messages(guild.id))
+    try:
+        # Replaces the previous snapshot and keeps the embed
+        await message.edit(attachments=[discord.File(io.BytesIO(data), filename=SNAPSHOT_FILENAME)])
+    except discord.NotFound:
+        await resolver.forget_message(guild.id, message.id)
+        ledger.mark_dirty(guild, 0)
+
+# Coalesces ledger re-renders so a burst of mutations costs one edit
+ledger = LedgerWriter(lambda guild, shards: background_metrics.run('ledger_flush', update_keys_message(guild, shards)))
+
+# Snapshots hold every key, so they are re-uploaded at most once per interval instead of on every ledger edit
+SNAPSHOT_INTERVAL = 60
+snapshots = LedgerWriter(
+    lambda guild, shards: background_metrics.run('snapshot_upload', update_keys_snapshot(guild)),
+    window=SNAPSHOT_INTERVAL, min_interval=SNAPSHOT_INTERVAL
+)
+
+def on_keys_expired(guild_id, shards):
+    """Queue a re-render of the ledger shards whose keys just expired"""
+    guild = bot.get_guild(guild_id)
+    if guild:
+        for shard in shards:
+            ledger.mark_dirty(guild, shard)
+
+# Sleeps until the next key expires, then flags all due keys at once
+sweeper = ExpirySweeper(store, clock, on_keys_expired)
+
+# Counters the components already keep, read at scrape time
+registry.collector(stats_collector('ledger_writer', ledger.stats))
+registry.collector(stats_collector('snapshot_writer', snapshots.stats))
+registry.collector(stats_collector('clock', clock.status))
+registry.collector(stats_collector('expiry_sweeper', lambda: {'sweeps': sweeper.sweeps, 'expired': sweeper.expired}))
+registry.collector(stats_collector('guild_resolver', resolver.stats))
+registry.collector(stats_collector('embed_cache', renderer.stats))
+registry.collector(stats_collector('legacy_loads', legacy_loads.stats))
+registry.collector(stats_collector('key_store', store.stats))
+registry.collector(stats_collector('key_generator', keygen.stats))
+registry.collector(stats_collector('key_filter', lambda: store.index.filter.stats()))
+registry.collector(stats_collector('event_loop', loop_monitor.stats))
+registry.collector(stats_collector('stall_watchdog', stall_watchdog.stats))
+registry.collector(lambda: [(
+    'stall_watchdog_operation_stalls', 'counter', 'Event-loop stalls detected while an operation was running',
+    {(name,): count for name, count in stall_watchdog.stalls_by_operation().items()}, ('operation',)
+)])
+registry.collector(stats_collector(
+    'rate_limit', lambda: {name: limiter.stats() for name, limiter in rate_limits.items()}, labelname='limiter'
+))
 
 def generate_key():
-    """Generate a key in ASTRA-XXXXX format"""
-    characters = string.ascii_uppercase + string.digits
-    random_part = ''.join(random.choices(characters, k=5))
-    return f"ASTRA-{random_part}"
+    """A new, unused key from the pool"""
+    return keygen.take()
+
+DURATION_UNITS = {
+    # Unit keyword -> (timedelta for one unit, singular name)
+    'min': (timedelta(minutes=1), "minute"),
+    'hour': (timedelta(hours=1), "hour"),
+    'day': (timedelta(days=1), "day"),
+    'week': (timedelta(weeks=1), "week"),
+    'month': (timedelta(days=30), "month")
+}
+DURATION_FORMATS = "1min, 1hour, 1day, 1week, 1month, or lifetime"
+
+def parse_duration(duration, now):
+    """(expires_at, duration text) for a duration like 3day or lifetime, None for an unknown unit
+
+    Raises ValueError if the duration has no number or ends past the year 9999.
+    """
+    duration_lower = duration.lower()
+    if duration_lower == 'lifetime':
+        return None, "Lifetime"
+    for unit, (length, name) in DURATION_UNITS.items():
+        if unit in duration_lower:
+            count = int(''.join(filter(str.isdigit, duration)))
+            try:
+                expires_at = now + length * count
+            except OverflowError:
+                raise ValueError("Duration out of range") from None
+            return expires_at, f"{count} {name}{'s' if count != 1 else ''}"
+    return None
+
+def new_key_embed(key, author, guild, duration_text, now):
+    """The DM telling a user about their new key"""
+    embed = discord.Embed(
+        title="New Authentication Key Generated",
+        description=f"Your new key: `{key}`",
+        color=0x00ff00
+    )
+    embed.add_field(name="Generated by", value=f"<@{author.id}>", inline=True)
+    embed.add_field(name="Server", value=guild.name, inline=True)
+    embed.add_field(name="Duration", value=duration_text, inline=True)
+    embed.add_field(name="Generated at", value=f"<t:{int(now.timestamp())}:F>", inline=False)
+    embed.set_footer(text="Keep this key safe and don't share it with anyone!")
+    return embed
 
 @bot.event
 async def on_ready():
     print(f'{bot.user} has connected to Discord!')
     print('Bot is running on Railway!')
     
-    # Auto-post customer message in customer channel
-    await post_customer_message()
+    # Load every guild's keys up front; the validation API never triggers the import itself
+    global keys_loader
+    if keys_loader is None or keys_loader.done():
+        keys_loader = asyncio.create_task(load_all_guild_keys(), name='load-guild-keys')
+    
+    # Auto-post customer message in each guild's customer channel
+    for guild in bot.guilds:
+        await post_customer_message(guild)
+
+@bot.event
+async def on_guild_join(guild):
+    await load_all_guild_keys([guild])
+
+keys_loader = None  # Task loading every guild's keys after connecting
+keys_load_errors = {}  # guild_id -> error of a load that retrying can't fix
+KEYS_LOAD_RETRY_DELAY = 30
+
+async def load_all_guild_keys(guilds=None):
+    """Import (or restore from the ledger snapshot) each guild's keys, retrying guilds that fail"""
+    pending = list(bot.guilds if guilds is None else guilds)
+    while pending:
+        results = await asyncio.gather(*(import_legacy_keys(guild) for guild in pending), return_exceptions=True)
+        failed = []
+        for guild, result in zip(pending, results):
+            if isinstance(result, discord.Forbidden):
+                # Missing permissions don't fix themselves; the next interaction in the guild tries again
+                keys_load_errors[guild.id] = str(result)
+                print(f"Can't load keys for {guild.name}, giving up until its next interaction: {str(result)}")
+            elif isinstance(result, Exception):
+                print(f"Error loading keys for {guild.name}: {str(result)}")
+                failed.append(guild)
+        pending = failed
+        if pending:
+            await asyncio.sleep(KEYS_LOAD_RETRY_DELAY)
 
-async def post_customer_message():
-    """Post the customer message in the customer channel"""
+@bot.event
+async def on_guild_channel_delete(channel):
+    # Drop cached IDs that pointed into the deleted channel
+    await resolver.forget_channel(channel)
+
+@bot.event
+async def on_raw_message_delete(payload):
+    if payload.guild_id:
+        await resolver.forget_message(payload.guild_id, payload.message_id)
+
+@bot.event
+async def on_raw_bulk_message_delete(payload):
+    if payload.guild_id:
+        for message_id in payload.message_ids:
+            await resolver.forget_message(payload.guild_id, message_id)
+
+async def post_customer_message(guild):
+    """Post the customer message in the guild's customer channel"""
     try:
         # Find the customer channel or create it
-        customer_channel = None
-        customer_category = None
+        customer_channel = await resolver.customer_channel(guild)
         
-        for guild in bot.guilds:
-            # First, try to find existing customer channel
-            for channel in guild.channels:
-                if channel.name.lower() == 'customer' and isinstance(channel, discord.TextChannel):
-                    customer_channel = channel
-                    break
-            
-            if customer_channel:
-                break
-            
+        if not customer_channel:
             # If no customer channel found, create category and channel
             # Find or create Customer category
+            customer_category = None
             for category in guild.categories:
                 if category.name.lower() == 'customer':
                     customer_category = category
@@ -512,51 +802,28 @@ async def post_customer_message():
             
             # Create customer channel
             customer_channel = await customer_category.create_text_channel("customer")
+            await resolver.remember(guild.id, customer_channel_id=customer_channel.id)
             print(f"Created 'customer' channel in {guild.name}")
-            break
-        
-        if not customer_channel:
-            print("Could not find or create customer channel!")
-            return
-        
-        # Create embed with exact text from image
-        embed = discord.Embed(
-            title="👑 Customer Support",
-            description="",
-            color=0x2f3136  # Dark grey background
-        )
-        
-        # Add the exact text from the image
-        embed.add_field(
-            name="**Fetch Key**",
-            value="Forgot your key? Click \"**Fetch Key**\" to retrieve it if it's linked to your Discord account.",
-            inline=False
-        )
         
-        embed.add_field(
-            name="**Reset HWID**",
-            value="Click \"**Reset HWID**\", enter your key – if it's assigned to you, the HWID will be reset.",
-            inline=False
-        )
-        
-        embed.add_field(
-            name="***Note:***",
-            value="*HWID resets have a 24h cooldown. Repeated resets may flag your key for sharing. Contact us if you need an early reset.*",
-            inline=False
-        )
+        # Static panel embed, built once
+        embed = renderer.customer_embed()
         
         # Create buttons
         view = CustomerKeyView(0)  # 0 means anyone can use it
         
         # Check if message already exists
-        async for message in customer_channel.history(limit=10):
-            if message.embeds and message.embeds[0].fields and message.embeds[0].fields[0].name == "**Fetch Key**":
+        message = await resolver.customer_message(customer_channel)
+        if message:
+            try:
                 # Update existing message
                 await message.edit(embed=embed, view=view)
                 return
+            except discord.NotFound:
+                await resolver.forget_message(guild.id, message.id)
         
         # Send new message
-        await customer_channel.send(embed=embed, view=view)
+        message = await customer_channel.send(embed=embed, view=view)
+        await resolver.remember(guild.id, customer_message_id=message.id)
         
     except Exception as e:
         print(f"Error posting customer message: {str(e)}")
@@ -568,7 +835,7 @@ async def setup_customer_channel(ctx):
         await ctx.send("You need administrator permissions to use this command!")
         return
     
-    await post_customer_message()
+    await post_customer_message(ctx.guild)
     await ctx.send("Customer channel message has been posted!")
 
 @bot.command(name='genkey')
@@ -582,78 +849,33 @@ async def generate_key_command(ctx, user: discord.Member, duration: str):
     
     try:
         # Parse duration
-        duration_lower = duration.lower()
         now = get_utc_time()
-        
-        if duration_lower == 'lifetime':
-            expires_at = None
-            duration_text = "Lifetime"
-        elif 'min' in duration_lower:
-            minutes = int(''.join(filter(str.isdigit, duration)))
-            expires_at = now + timedelta(minutes=minutes)
-            duration_text = f"{minutes} minute{'s' if minutes != 1 else ''}"
-        elif 'hour' in duration_lower:
-            hours = int(''.join(filter(str.isdigit, duration)))
-            expires_at = now + timedelta(hours=hours)
-            duration_text = f"{hours} hour{'s' if hours != 1 else ''}"
-        elif 'day' in duration_lower:
-            days = int(''.join(filter(str.isdigit, duration)))
-            expires_at = now + timedelta(days=days)
-            duration_text = f"{days} day{'s' if days != 1 else ''}"
-        elif 'week' in duration_lower:
-            weeks = int(''.join(filter(str.isdigit, duration)))
-            expires_at = now + timedelta(weeks=weeks)
-            duration_text = f"{weeks} week{'s' if weeks != 1 else ''}"
-        elif 'month' in duration_lower:
-            months = int(''.join(filter(str.isdigit, duration)))
-            expires_at = now + timedelta(days=months * 30)
-            duration_text = f"{months} month{'s' if months != 1 else ''}"
-        else:
-            await ctx.send("Invalid duration! Use: 1min, 1hour, 1day, 1week, 1month, or lifetime")
+        parsed = parse_duration(duration, now)
+        if parsed is None:
+            await ctx.send(f"Invalid duration! Use: {DURATION_FORMATS}")
             return
+        expires_at, duration_text = parsed
         
         # Generate new key
         new_key = generate_key()
         
-        # Find keys channel
-        keys_channel = None
-        for channel in ctx.guild.channels:
-            if channel.name.lower() == 'keys' and isinstance(channel, discord.TextChannel):
-                keys_channel = channel
-                break
-        
-        if not keys_channel:
-            keys_channel = await ctx.guild.create_text_channel('keys')
-        
-        # Load existing keys from Discord
-        keys = await load_keys_from_discord(keys_channel)
+        # Store new key with expiration
+        await import_legacy_keys(ctx.guild)
+        shard = await store.add_key(KeyRecord(
+            new_key,
+            ctx.guild.id,
+            user.id,
+            duration=duration_text,
+            created_at=to_epoch(now),
+            expires_at=to_epoch(expires_at)
+        ))
         
-        # Add new key with expiration
-        keys[new_key] = {
-            'user_id': user.id,
-            'used': False,
-            'duration': duration_text,
-            'expires_at': expires_at.isoformat() if expires_at else None,
-            'created_at': now.isoformat()
-        }
-        
-        # Update the keys message in Discord
-        await update_keys_message(ctx, keys)
+        # Queue a re-render of the keys message
+        ledger.mark_dirty(ctx.guild, shard)
         
         # Try to send key to user via DM
         try:
-            embed = discord.Embed(
-                title="New Authentication Key Generated",
-                description=f"Your new key: `{new_key}`",
-                color=0x00ff00
-            )
-            embed.add_field(name="Generated by", value=f"<@{ctx.author.id}>", inline=True)
-            embed.add_field(name="Server", value=ctx.guild.name, inline=True)
-            embed.add_field(name="Duration", value=duration_text, inline=True)
-            embed.add_field(name="Generated at", value=f"<t:{int(now.timestamp())}:F>", inline=False)
-            embed.set_footer(text="Keep this key safe and don't share it with anyone!")
-            
-            await user.send(embed=embed)
+            await user.send(embed=new_key_embed(new_key, ctx.author, ctx.guild, duration_text, now))
             
             # Confirm to admin
             await ctx.send(f"Key `{new_key}` has been generated and sent to {user.mention}!")
@@ -666,146 +888,259 @@ async def generate_key_command(ctx, user: discord.Member, duration: str):
     except Exception as e:
         await ctx.send(f"Error generating key: {str(e)}")
 
-@bot.command(name='listkeys')
-async def list_keys(ctx):
-    """Update the keys message in Discord (admin only)"""
+# Bulk issuance limits
+MAX_BULK_KEYS = 1000
+DM_CONCURRENCY = 5
+PROGRESS_INTERVAL = 3  # Seconds between progress message edits
+
+USER_MENTION = re.compile(r'<@!?(\d+)>|(\d+)')
+
+def parse_user_id(value):
+    """User ID from a mention or a bare ID, or None"""
+    match = USER_MENTION.fullmatch(value.strip())
+    return int(match.group(1) or match.group(2)) if match else None
+
+def read_bulk_csv(data, default_duration):
+    """[(user ID, duration)] and [(row label, reason)] from CSV rows of ``user[,duration]``"""
+    requests, failures = [], []
+    rows = csv.reader(io.StringIO(data.decode('utf-8-sig', errors='replace')))
+    for number, row in enumerate(rows, 1):
+        if not row or not ''.join(row).strip():
+            continue
+        user_id = parse_user_id(row[0])
+        if user_id is None:
+            # A header row, or garbage
+            if number > 1:
+                failures.append((f"row {number}", f"not a user: {row[0][:40]}"))
+            continue
+        duration = row[1].strip() if len(row) > 1 and row[1].strip() else default_duration
+        if not duration:
+            failures.append((f"<@{user_id}>", "no duration"))
+            continue
+        requests.append((user_id, duration))
+    return requests, failures
+
+def dm_failure_reason(error):
+    if isinstance(error, discord.Forbidden):
+        return "DMs disabled"
+    if isinstance(error, discord.NotFound):
+        return "unknown user"
+    return str(error)
+
+def bulk_report(issued, sender, failures, finished):
+    """Progress/summary text, kept under Discord's message limit"""
+    lines = [
+        f"{'Bulk issue finished' if finished else 'Bulk issue in progress'}: {issued} keys issued, "
+        f"DMs {sender.succeeded}/{issued} sent, {len(sender.failures) + len(failures)} failed"
+    ]
+    all_failures = failures + [
+        (f"<@{record.user_id}> `{record.key}`", dm_failure_reason(error)) for record, error in sender.failures
+    ]
+    for count, (label, reason) in enumerate(all_failures):
+        line = f"- {label}: {reason}"
+        if sum(len(l) + 1 for l in lines) + len(line) > 1900:
+            lines.append(f"...and {len(all_failures) - count} more in the attached file")
+            break
+        lines.append(line)
+    return "\n".join(lines)
+
+@bot.command(name='bulkgenkey')
+async def bulk_generate_keys(ctx, duration: str = None, role: discord.Role = None):
+    """Generate keys for every member of a role, or for the users in an attached CSV (admin only)"""
     if not ctx.author.guild_permissions.administrator:
         await ctx.send("You need administrator permissions to use this command!")
         return
     
-    # Find keys channel
-    keys_channel = None
-    for channel in ctx.guild.channels:
-        if channel.name.lower() == 'keys' and isinstance(channel, discord.TextChannel):
-            keys_channel = channel
-            break
-    
-    if not keys_channel:
-        await ctx.send("No keys channel found!")
+    attachment = ctx.message.attachments[0] if ctx.message.attachments else None
+    if attachment is None and (role is None or duration is None):
+        await ctx.send("Usage: `!bulkgenkey <duration> @role`, or attach a CSV of `user,duration` rows "
+                       "to `!bulkgenkey [default duration]`")
         return
     
-    # Load keys from Discord
-    keys = await load_keys_from_discord(keys_channel)
+    # Who gets which duration
+    if attachment is not None:
+        requests, failures = read_bulk_csv(await attachment.read(), duration)
+    else:
+        if not bot.intents.members:
+            await ctx.send("Issuing by role needs the Server Members intent; attach a CSV of user IDs instead.")
+            return
+        if not ctx.guild.chunked:
+            await ctx.guild.chunk()
+        requests = [(member.id, duration) for member in role.members if not member.bot]
+        failures = []
     
-    # Update the keys message
-    await update_keys_message(ctx, keys)
-    await ctx.send("Keys list has been updated in the #keys channel!")
-
-@bot.command(name='usekey')
-async def use_key(ctx, key: str):
-    """Mark a key as used"""
-    # Find keys channel
-    keys_channel = None
-    for channel in ctx.guild.channels:
-        if channel.name.lower() == 'keys' and isinstance(channel, discord.TextChannel):
-            keys_channel = channel
-            break
+    if len(requests) > MAX_BULK_KEYS:
+        await ctx.send(f"Too many keys! Bulk issuance is limited to {MAX_BULK_KEYS} keys at a time.")
+        return
     
-    if not keys_channel:
-        await ctx.send("No keys channel found!")
+    now = get_utc_time()
+    issues = []  # (user ID, duration text, expires_at)
+    for user_id, user_duration in requests:
+        try:
+            parsed = parse_duration(user_duration, now)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            failures.append((f"<@{user_id}>", f"invalid duration {user_duration[:20]}"))
+            continue
+        expires_at, duration_text = parsed
+        issues.append((user_id, duration_text, expires_at))
+    
+    if not issues:
+        await ctx.send(bulk_report(0, FanOut(), failures, True))
         return
     
-    # Load keys from Discord
-    keys = await load_keys_from_discord(keys_channel)
+    # Keys come from the pool; one transaction stores them all and queues one ledger re-render
+    records = [
+        KeyRecord(
+            key,
+            ctx.guild.id,
+            user_id,
+            duration=duration_text,
+            created_at=to_epoch(now),
+            expires_at=to_epoch(expires_at)
+        )
+        for key, (user_id, duration_text, expires_at) in zip(keygen.take_many(len(issues)), issues)
+    ]
     
-    if key not in keys:
-        await ctx.send("Invalid key!")
+    def issue(txn):
+        for record in records:
+            txn.add(record)
+    
+    await transact(ctx.guild, issue)
+    
+    # DM everyone, a few at a time, with a progress message that is edited as they go
+    sender = FanOut(DM_CONCURRENCY)
+    progress = await ctx.send(bulk_report(len(records), sender, failures, False))
+    
+    async def send_key(record):
+        user = bot.get_user(record.user_id) or await bot.fetch_user(record.user_id)
+        await user.send(embed=new_key_embed(record.key, ctx.author, ctx.guild, record.duration, now))
+    
+    async def report_progress():
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            try:
+                await progress.edit(content=bulk_report(len(records), sender, failures, False))
+            except discord.HTTPException:
+                pass
+    
+    reporter = asyncio.create_task(report_progress())
+    try:
+        await sender.run(records, send_key)
+    finally:
+        reporter.cancel()
+    
+    # Every issued key with its DM result, so failed DMs can be delivered by hand
+    dm_errors = {id(record): dm_failure_reason(error) for record, error in sender.failures}
+    results = io.StringIO()
+    writer = csv.writer(results)
+    writer.writerow(['user_id', 'key', 'duration', 'dm'])
+    for record in records:
+        writer.writerow([record.user_id, record.key, record.duration, dm_errors.get(id(record), 'sent')])
+    for label, reason in failures:
+        writer.writerow([label, '', '', reason])
+    
+    await progress.edit(content=bulk_report(len(records), sender, failures, True))
+    await ctx.send(file=discord.File(io.BytesIO(results.getvalue().encode()), filename='bulk-keys.csv'))
+
+@bot.command(name='listkeys')
+async def list_keys(ctx):
+    """Update the keys message in Discord (admin only)"""
+    if not ctx.author.guild_permissions.administrator:
+        await ctx.send("You need administrator permissions to use this command!")
         return
     
-    if keys[key]['used']:
-        await ctx.send("This key has already been used!")
+    # Re-render the keys message and its snapshot from the store right away
+    await ledger.flush(ctx.guild)
+    await snapshots.flush(ctx.guild)
+    await ctx.send("Keys list has been updated in the #keys channel!")
+
+@bot.command(name='profile')
+async def profile_command(ctx, seconds: int = 10):
+    """Sample the event loop for N seconds and report the hottest frames (admin only)"""
+    if not ctx.author.guild_permissions.administrator:
+        await ctx.send("You need administrator permissions to use this command!")
         return
     
-    if keys[key]['user_id'] != ctx.author.id:
-        await ctx.send("This key doesn't belong to you!")
+    if not 1 <= seconds <= MAX_PROFILE_SECONDS:
+        await ctx.send(f"Profile duration must be between 1 and {MAX_PROFILE_SECONDS} seconds!")
         return
     
-    # Mark key as used
-    keys[key]['used'] = True
+    if profiler.running:
+        await ctx.send("A profile is already running!")
+        return
     
-    # Update the keys message in Discord
-    await update_keys_message(ctx, keys)
+    await ctx.send(f"Profiling the event loop for {seconds}s...")
+    result = await profiler.run(seconds)
     
-    await ctx.send("Key has been successfully used!")
+    # Collapsed stacks for flamegraph.pl / speedscope; attached too, since Railway disks don't persist
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"profile-{get_utc_time().strftime('%Y%m%d-%H%M%S')}.txt")
+    await asyncio.to_thread(result.write, path)
+    
+    busy = result.busy
+    lines = [
+        f"Profiled {result.duration:.1f}s: {result.samples} samples, "
+        f"{busy / result.samples:.0%} busy" if result.samples else f"Profiled {result.duration:.1f}s: no samples",
+    ]
+    if busy:
+        lines.append("```")
+        lines.append(f"{'self':>6} {'total':>6}  frame")
+        for label, own, total in result.hottest(10):
+            lines.append(f"{own / busy:>6.1%} {total / busy:>6.1%}  {label[:80]}")
+        lines.append("```")
+    await ctx.send("\n".join(lines), file=discord.File(path))
+
+@bot.command(name='usekey')
+async def use_key(ctx, key: str):
+    """Mark a key as used"""
+    if not key_format.is_well_formed(key):
+        await ctx.send("Invalid key!")
+        return
+    
+    def use(txn):
+        key_data = txn.get(key)
+        
+        if not key_data:
+            return "Invalid key!"
+        
+        if key_data.used:
+            return "This key has already been used!"
+        
+        if key_data.user_id != ctx.author.id:
+            return "This key doesn't belong to you!"
+        
+        # Mark key as used
+        txn.update(key, status=KeyStatus.USED)
+        return "Key has been successfully used!"
+    
+    txn = await transact(ctx.guild, use)
+    await ctx.send(txn.result)
 
 @bot.command(name='deletekey')
 async def delete_key(ctx, key: str):
-    """Delete a key (admin only) - uses same key extraction as login.py"""
+    """Delete a key (admin only)"""
     if not ctx.author.guild_permissions.administrator:
         await ctx.send("You need administrator permissions to use this command!")
         return
     
+    if not key_format.is_well_formed(key):
+        await ctx.send("Key not found!")
+        return
+    
     try:
-        # Use the exact same logic as login.py
-        # Find the keys channel
-        keys_channel = await find_keys_channel(ctx.guild)
-        if not keys_channel:
-            await ctx.send("No keys channel found!")
-            return
-        
-        # Find the keys message
-        keys_message = await find_keys_message(keys_channel)
-        if not keys_message:
-            await ctx.send("No keys message found!")
-            return
+        await import_legacy_keys(ctx.guild)
         
-        # Extract keys from the embed using the same function as login.py
-        keys = extract_keys_from_embed(keys_message.embeds[0])
-        
-        # Check if the key exists
-        if key not in keys:
+        # Remove the key
+        shard = await store.delete_key(ctx.guild.id, key)
+        if shard is None:
             await ctx.send("Key not found!")
             return
+        renderer.forget(key)
         
-        # Remove the key
-        del keys[key]
-        
-        # Create new embed with updated keys (same as login.py mark_key_as_used)
-        embed = discord.Embed(
-            title="Generated Keys",
-            color=0x0099ff,
-            timestamp=keys_message.embeds[0].timestamp
-        )
-        
-        if keys:  # Only add fields if there are keys left
-            for key_name, data in keys.items():
-                status = "Used" if data['used'] else "Unused"
-                duration = data.get('duration', 'Unknown')
-                expires_at = data.get('expires_at')
-                hwid = data.get('hwid')
-                
-                # Check if key is expired
-                if expires_at and not data['used']:
-                    try:
-                        expire_time = datetime.fromisoformat(expires_at)
-                        if get_utc_time() > expire_time:
-                            status = "Expired"
-                    except:
-                        pass
-                
-                value_text = f"User: <@{data['user_id']}>\nStatus: {status}\nDuration: {duration}"
-                if expires_at and status != "Expired":
-                    try:
-                        expire_time = datetime.fromisoformat(expires_at)
-                        value_text += f"\nExpires: {expire_time.strftime('%Y-%m-%d %H:%M:%S')}"
-                    except:
-                        pass
-                
-                if hwid:
-                    value_text += f"\nHWID: {hwid}"
-                
-                embed.add_field(
-                    name=f"`{key_name}`",
-                    value=value_text,
-                    inline=True
-                )
-        else:
-            embed.description = "No keys have been generated yet."
-        
-        embed.set_footer(text=f"Total Keys: {len(keys)}")
-        
-        # Update the message
-        await keys_message.edit(embed=embed)
+        # Queue a re-render of the keys message
+        ledger.mark_dirty(ctx.guild, shard)
         
         await ctx.send(f"Key `{key}` has been deleted!")
         
@@ -816,22 +1151,8 @@ async def delete_key(ctx, key: str):
 async def customer_panel(ctx):
     """Create customer interface with Fetch Key and Reset HWID buttons"""
     try:
-        # Use the same logic as login.py to find keys
-        keys_channel = await find_keys_channel(ctx.guild)
-        if not keys_channel:
-            await ctx.send("No keys channel found!")
-            return
-        
-        keys_message = await find_keys_message(keys_channel)
-        if not keys_message:
-            await ctx.send("No keys message found!")
-            return
-        
-        # Extract keys from the embed using the same function as login.py
-        keys = extract_keys_from_embed(keys_message.embeds[0])
-        
         # Get user's keys
-        user_keys = get_user_keys(keys, ctx.author.id)
+        user_keys = await get_user_keys(ctx.guild, ctx.author.id)
         
         if not user_keys:
             await ctx.send("You don't have any keys!")
@@ -847,7 +1168,7 @@ async def customer_panel(ctx):
         
         # Add key information
         key_count = len(user_keys)
-        used_count = len([k for k, d in user_keys.items() if d['used']])
+        used_count = len([k for k, record in user_keys.items() if record.used])
         unused_count = key_count - used_count
         
         embed.add_field(
@@ -887,65 +1208,15 @@ async def customer_panel(ctx):
 async def my_keys(ctx):
     """Show user's keys and reset HWID option"""
     try:
-        # Use the same logic as login.py to find keys
-        keys_channel = await find_keys_channel(ctx.guild)
-        if not keys_channel:
-            await ctx.send("No keys channel found!")
-            return
-        
-        keys_message = await find_keys_message(keys_channel)
-        if not keys_message:
-            await ctx.send("No keys message found!")
-            return
-        
-        # Extract keys from the embed using the same function as login.py
-        keys = extract_keys_from_embed(keys_message.embeds[0])
-        
         # Get user's keys
-        user_keys = get_user_keys(keys, ctx.author.id)
+        user_keys = await get_user_keys(ctx.guild, ctx.author.id)
         
         if not user_keys:
             await ctx.send("You don't have any keys!")
             return
         
         # Create embed with user's keys
-        embed = discord.Embed(
-            title="🔑 Your Authentication Keys",
-            color=0x0099ff,
-            timestamp=get_utc_time()
-        )
-        
-        for key, data in user_keys.items():
-            status = "Used" if data['used'] else "Unused"
-            duration = data.get('duration', 'Unknown')
-            expires_at = data.get('expires_at')
-            hwid = data.get('hwid')
-            
-            # Check if key is expired
-            if expires_at and not data['used']:
-                try:
-                    expire_time = datetime.fromisoformat(expires_at)
-                    if get_utc_time() > expire_time:
-                        status = "Expired"
-                except:
-                    pass
-            
-            value_text = f"**Status:** {status}\n**Duration:** {duration}"
-            if expires_at and status != "Expired":
-                try:
-                    expire_time = datetime.fromisoformat(expires_at)
-                    value_text += f"\n**Expires:** {expire_time.strftime('%Y-%m-%d %H:%M:%S')}"
-                except:
-                    pass
-            
-            if hwid:
-                value_text += f"\n**HWID:** `{hwid[:8]}...`"
-            
-            embed.add_field(
-                name=f"`{key}`",
-                value=value_text,
-                inline=True
-            )
+        embed = renderer.user_keys_embed(user_keys, get_utc_time())
         
         # Add reset information
         can_reset = can_user_reset_hwid(ctx.author.id)
@@ -972,108 +1243,50 @@ async def my_keys(ctx):
 @bot.command(name='customerreset')
 async def customer_reset_hwid(ctx, key: str):
     """Customer command to reset HWID for their own key (once per day)"""
-    try:
-        # Use the same logic as login.py to find keys
-        keys_channel = await find_keys_channel(ctx.guild)
-        if not keys_channel:
-            await ctx.send("No keys channel found!")
-            return
-        
-        keys_message = await find_keys_message(keys_channel)
-        if not keys_message:
-            await ctx.send("No keys message found!")
-            return
-        
-        # Extract keys from the embed using the same function as login.py
-        keys = extract_keys_from_embed(keys_message.embeds[0])
+    if not rate_limits['interactions'].allow(ctx.author.id):
+        await ctx.send(slow_down_message(ctx.author.id))
+        return
+    
+    if not key_format.is_well_formed(key):
+        await ctx.send("❌ Key not found!")
+        return
+    
+    def reset(txn):
+        key_data = txn.get(key)
         
         # Check if the key exists
-        if key not in keys:
-            await ctx.send("❌ Key not found!")
-            return
-        
-        key_data = keys[key]
+        if not key_data:
+            return "❌ Key not found!"
         
         # Check if user owns this key
-        if key_data['user_id'] != ctx.author.id:
-            await ctx.send("❌ This key doesn't belong to you!")
-            return
+        if key_data.user_id != ctx.author.id:
+            return "❌ This key doesn't belong to you!"
         
         # Check if user can reset (once per day)
         if not can_user_reset_hwid(ctx.author.id):
             last_reset = datetime.fromisoformat(user_reset_times[ctx.author.id])
             next_reset = last_reset + timedelta(days=1)
-            await ctx.send(f"⏰ You can reset your HWID again at: **{next_reset.strftime('%Y-%m-%d %H:%M:%S')} UTC**")
-            return
+            return f"⏰ You can reset your HWID again at: **{next_reset.strftime('%Y-%m-%d %H:%M:%S')} UTC**"
         
         # Verify key validity like login.py does
-        expires_at = key_data.get('expires_at')
-        if expires_at:
-            try:
-                expire_time = datetime.fromisoformat(expires_at)
-                if get_utc_time() > expire_time:
-                    await ctx.send("❌ Key has expired!")
-                    return
-            except:
-                pass
+        if key_data.expired:
+            return "❌ Key has expired!"
         
         # Check if key is already unused (no need to reset)
-        if not key_data['used']:
-            await ctx.send(f"ℹ️ Key `{key}` is already unused!")
-            return
+        if not key_data.used:
+            return f"ℹ️ Key `{key}` is already unused!"
         
         # Reset HWID and used status
-        keys[key]['hwid'] = None
-        keys[key]['used'] = False
-        
-        # Mark user as having reset
-        mark_user_reset_hwid(ctx.author.id)
-        
-        # Create new embed with updated keys (same as login.py mark_key_as_used)
-        embed = discord.Embed(
-            title="Generated Keys",
-            color=0x0099ff,
-            timestamp=keys_message.embeds[0].timestamp
-        )
-        
-        for key_name, data in keys.items():
-            status = "Used" if data['used'] else "Unused"
-            duration = data.get('duration', 'Unknown')
-            expires_at = data.get('expires_at')
-            hwid = data.get('hwid')
-            
-            # Check if key is expired
-            if expires_at and not data['used']:
-                try:
-                    expire_time = datetime.fromisoformat(expires_at)
-                    if get_utc_time() > expire_time:
-                        status = "Expired"
-                except:
-                    pass
-            
-            value_text = f"User: <@{data['user_id']}>\nStatus: {status}\nDuration: {duration}"
-            if expires_at and status != "Expired":
-                try:
-                    expire_time = datetime.fromisoformat(expires_at)
-                    value_text += f"\nExpires: {expire_time.strftime('%Y-%m-%d %H:%M:%S')}"
-                except:
-                    pass
-            
-            if hwid:
-                value_text += f"\nHWID: {hwid}"
-            
-            embed.add_field(
-                name=f"`{key_name}`",
-                value=value_text,
-                inline=True
-            )
-        
-        embed.set_footer(text=f"Total Keys: {len(keys)}")
-        
-        # Update the message
-        await keys_message.edit(embed=embed)
+        txn.update(key, status=KeyStatus.UNUSED, hwid=None)
+        return f"✅ **HWID Reset Successful!**\nKey `{key}` has been reset and can now be used again on any device."
+    
+    try:
+        txn = await transact(ctx.guild, reset)
+        if txn.writes:
+            # Mark user as having reset
+            mark_user_reset_hwid(ctx.author.id)
         
-        await ctx.send(f"✅ **HWID Reset Successful!**\nKey `{key}` has been reset and can now be used again on any device.")
+        await ctx.send(txn.result)
         
     except Exception as e:
         await ctx.send(f"❌ Error resetting HWID: {str(e)}")
@@ -1087,96 +1300,32 @@ async def reset_hwid(ctx, key: str):
 @bot.command(name='resetkey')
 async def reset_key(ctx, key: str):
     """Reset a key's HWID - verifies key validity like login.py"""
+    if not key_format.is_well_formed(key):
+        await ctx.send("Key not found!")
+        return
     
-    try:
-        # Use the exact same logic as login.py
-        # Find the keys channel
-        keys_channel = await find_keys_channel(ctx.guild)
-        if not keys_channel:
-            await ctx.send("No keys channel found!")
-            return
-        
-        # Find the keys message
-        keys_message = await find_keys_message(keys_channel)
-        if not keys_message:
-            await ctx.send("No keys message found!")
-            return
-        
-        # Extract keys from the embed using the same function as login.py
-        keys = extract_keys_from_embed(keys_message.embeds[0])
+    def reset(txn):
+        key_data = txn.get(key)
         
         # Check if the key exists
-        if key not in keys:
-            await ctx.send("Key not found!")
-            return
-        
-        key_data = keys[key]
+        if not key_data:
+            return "Key not found!"
         
         # Verify key validity like login.py does
-        expires_at = key_data.get('expires_at')
-        if expires_at:
-            try:
-                expire_time = datetime.fromisoformat(expires_at)
-                if get_utc_time() > expire_time:
-                    await ctx.send("Key has expired!")
-                    return
-            except:
-                pass
+        if key_data.expired:
+            return "Key has expired!"
         
         # Check if key is already unused (no need to reset)
-        if not key_data['used']:
-            await ctx.send(f"Key `{key}` is already unused!")
-            return
+        if not key_data.used:
+            return f"Key `{key}` is already unused!"
         
         # Reset HWID and used status
-        keys[key]['hwid'] = None
-        keys[key]['used'] = False
-        
-        # Create new embed with updated keys (same as login.py mark_key_as_used)
-        embed = discord.Embed(
-            title="Generated Keys",
-            color=0x0099ff,
-            timestamp=keys_message.embeds[0].timestamp
-        )
-        
-        for key_name, data in keys.items():
-            status = "Used" if data['used'] else "Unused"
-            duration = data.get('duration', 'Unknown')
-            expires_at = data.get('expires_at')
-            hwid = data.get('hwid')
-            
-            # Check if key is expired
-            if expires_at and not data['used']:
-                try:
-                    expire_time = datetime.fromisoformat(expires_at)
-                    if get_utc_time() > expire_time:
-                        status = "Expired"
-                except:
-                    pass
-            
-            value_text = f"User: <@{data['user_id']}>\nStatus: {status}\nDuration: {duration}"
-            if expires_at and status != "Expired":
-                try:
-                    expire_time = datetime.fromisoformat(expires_at)
-                    value_text += f"\nExpires: {expire_time.strftime('%Y-%m-%d %H:%M:%S')}"
-                except:
-                    pass
-            
-            if hwid:
-                value_text += f"\nHWID: {hwid}"
-            
-            embed.add_field(
-                name=f"`{key_name}`",
-                value=value_text,
-                inline=True
-            )
-        
-        embed.set_footer(text=f"Total Keys: {len(keys)}")
-        
-        # Update the message
-        await keys_message.edit(embed=embed)
-        
-        await ctx.send(f"Key `{key}` has been successfully reset! It can now be used again.")
+        txn.update(key, status=KeyStatus.UNUSED, hwid=None)
+        return f"Key `{key}` has been successfully reset! It can now be used again."
+    
+    try:
+        txn = await transact(ctx.guild, reset)
+        await ctx.send(txn.result)
         
     except Exception as e:
         await ctx.send(f"Error resetting key: {str(e)}")
@@ -1197,11 +1346,6 @@ if __name__ == "__main__":
         print("Please set your Discord bot token in Railway Variables.")
     else:
         print("Starting Discord bot on Railway...")
-        # Start Discord bot in a separate thread
-        bot_thread = threading.Thread(target=bot.run, args=(BOT_TOKEN,))
-        bot_thread.daemon = True
-        bot_thread.start()
-        
-        # Start Flask server for health checks
-        port = int(os.environ.get('PORT', 8080))
-        app.run(host='0.0.0.0', port=port, debug=False)
+        # The HTTP server runs on the bot's event loop, started and stopped with the bot
+        bot.web_server = WebServer(routes, port=int(os.environ.get('PORT', 8080)), middlewares=[track_http_requests])
+        bot.run(BOT_TOKEN)
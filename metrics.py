@@ -0,0 +1,202 @@
+"""Prometheus-style metrics.
+
+A small registry of counters, gauges and histograms rendered in the
+Prometheus text exposition format for /metrics. Updating a metric is a dict
+lookup and an add, so instrumenting hot paths costs next to nothing. Values
+that other components already count (ledger writer, clock, caches) are
+pulled in by collector callbacks at scrape time instead of being mirrored
+on every update.
+"""
+import bisect
+import contextvars
+import functools
+import time
+
+# Latency buckets in seconds, from a cached index read up to a slow Discord round trip
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Name of the command/interaction being handled, for labelling the Discord calls it makes
+operation = contextvars.ContextVar('operation', default='background')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # label values tuple -> value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for labels, value in list(self._values.items()):
+            lines.append(f'{self.name}{_labels(self.labelnames, labels)} {value}')
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, *labels):
+        self._values[labels] = value
+
+    def inc(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        series = self._values.get(labels)
+        if series is None:
+            # Per-bucket (non-cumulative) counts, then sum and count
+            series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for labels, (counts, total, count) in list(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {total}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {count}')
+        return lines
+
+
+class Registry:
+    """Metrics plus collectors, rendered together"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        """Register fn() -> [(name, kind, documentation, {label tuple: value}, labelnames)], called per scrape"""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        """All metrics in the Prometheus text format"""
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        for collect in self._collectors:
+            for name, kind, documentation, values, labelnames in collect():
+                lines += [f'# HELP {name} {documentation}', f'# TYPE {name} {kind}']
+                for labels, value in values.items():
+                    lines.append(f'{name}{_labels(labelnames, labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def stats_collector(prefix, stats, labelname=None):
+    """Collector exposing every number in ``stats()`` as a gauge named ``prefix_<key>``
+
+    With ``labelname``, stats() returns {label value: stats dict} instead.
+    """
+    def collect():
+        current = stats()
+        series = current.items() if labelname else [(None, current)]
+        metrics = {}
+        for label, values in series:
+            for key, value in values.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if isinstance(value, (int, float)):
+                    labels = (label,) if labelname else ()
+                    metrics.setdefault(key, {})[labels] = value
+        return [
+            (f'{prefix}_{key}', 'gauge', f'{prefix} {key}', values, (labelname,) if labelname else ())
+            for key, values in metrics.items()
+        ]
+    return collect
+
+
+class Tracker:
+    """Counts, times and tracks in-flight runs of named operations"""
+
+    def __init__(self, registry, prefix, documentation):
+        self.total = registry.counter(f'{prefix}_total', f'{documentation} handled', ('name', 'outcome'))
+        self.latency = registry.histogram(f'{prefix}_duration_seconds', f'{documentation} latency', ('name',))
+        self.in_flight = registry.gauge(f'{prefix}_in_flight', f'{documentation} running now', ('name',))
+
+    async def run(self, name, coro, failed=None):
+        """Await coro as operation ``name``; outcome is "error" if it raises or ``failed()`` is true"""
+        token = operation.set(name)
+        self.in_flight.inc(name)
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = await coro
+            if failed is None or not failed():
+                outcome = 'ok'
+            return result
+        finally:
+            self.latency.observe(time.perf_counter() - start, name)
+            self.in_flight.dec(name)
+            self.total.inc(name, outcome)
+            operation.reset(token)
+
+    def __call__(self, name):
+        """Decorator for an async callback tracked as operation ``name``"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                return await self.run(name, fn(*args, **kwargs))
+            return wrapper
+        return decorator
+
+
+def stack_operation(frame):
+    """Operation being tracked in the stack ending at ``frame``, which may be another thread's
+
+    ``operation`` can only be read from the thread running the context, so a
+    watchdog looks for the innermost Tracker.run frame instead.
+    """
+    while frame is not None:
+        if frame.f_code is Tracker.run.__code__:
+            return frame.f_locals.get('name', operation.get())
+        frame = frame.f_back
+    return operation.get()
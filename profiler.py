@@ -0,0 +1,115 @@
+"""Sampling profiler for the event loop thread.
+
+When the bot gets slow in production the only question that matters is what
+the loop thread is doing, and a deterministic profiler slows every call down
+too much to leave running there. SamplingProfiler instead reads the loop
+thread's stack from a helper thread every few milliseconds, which costs the
+loop nothing between samples. Samples where the loop is waiting in its
+selector are idle time; the rest are written out in the collapsed-stack
+format that flamegraph.pl and speedscope read.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def _label(code):
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(code):
+    # The loop blocks in BaseSelector.select() (epoll/kqueue/select) when it has nothing to run
+    return code.co_name == 'select' and os.path.basename(code.co_filename) == 'selectors.py'
+
+
+class Profile:
+    """Stacks sampled from one profiling run"""
+
+    def __init__(self, stacks, idle, duration, interval):
+        self.stacks = stacks  # Counter of (root frame label, ..., leaf frame label) -> samples
+        self.idle = idle  # Samples taken while the loop was waiting for I/O
+        self.duration = duration
+        self.interval = interval
+
+    @property
+    def busy(self):
+        return sum(self.stacks.values())
+
+    @property
+    def samples(self):
+        return self.busy + self.idle
+
+    def collapsed(self):
+        """Busy stacks as ``frame;frame;frame count`` lines, hottest first"""
+        return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def write(self, path):
+        """Write the collapsed stacks to path"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+
+    def hottest(self, n=10):
+        """[(frame label, self samples, total samples)] of the n frames that were on top of the stack most"""
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                total[label] += count
+        return [(label, count, total[label]) for label, count in own.most_common(n)]
+
+
+class SamplingProfiler:
+    """Samples the event loop thread's stack every ``interval`` seconds while a run is active"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.running = False
+        self.runs = 0
+
+    async def run(self, seconds):
+        """Profile the calling loop's thread for ``seconds``; returns a Profile"""
+        if self.running:
+            raise RuntimeError("A profile is already running")
+        self.running = True
+        stacks = Counter()
+        idle = [0]
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._sample, args=(threading.get_ident(), stop, stacks, idle),
+            name='sampling-profiler', daemon=True
+        )
+        start = time.monotonic()
+        thread.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stop.set()
+            await asyncio.to_thread(thread.join)
+            self.running = False
+        self.runs += 1
+        return Profile(stacks, idle[0], time.monotonic() - start, self.interval)
+
+    def _sample(self, thread_id, stop, stacks, idle):
+        labels = {}  # code object -> label, so each frame is formatted once
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            if _is_idle(frame.f_code):
+                idle[0] += 1
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _label(code)
+                stack.append(label)
+                frame = frame.f_back
+            stack.reverse()
+            stacks[tuple(stack)] += 1
@@ -0,0 +1,75 @@
+"""In-memory token-bucket rate limiting.
+
+Nothing used to stop a client from spamming the validation API or a user
+from hammering the customer panel. A TokenBucketLimiter keeps one bucket per
+key (a user, an IP, a license key): each check refills the bucket for the
+time elapsed and takes a token, in O(1). Buckets live in an OrderedDict in
+least-recently-used order, so idle ones are evicted from the front in
+amortized O(1) as well.
+"""
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    """Allows ``burst`` requests at once per key, refilled at ``rate`` tokens per second"""
+
+    def __init__(self, rate, burst, idle_ttl=None, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        # A bucket idle this long has refilled completely, so dropping it changes nothing
+        self.idle_ttl = idle_ttl if idle_ttl is not None else burst / rate
+        self.clock = clock
+
+        self._buckets = OrderedDict()  # key -> [tokens, last update], least recently used first
+        self.allowed = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    def _bucket(self, key, now):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def _evict(self, now):
+        buckets = self._buckets
+        while buckets:
+            key, bucket = next(iter(buckets.items()))
+            if now - bucket[1] < self.idle_ttl:
+                break
+            del buckets[key]
+            self.evicted += 1
+
+    def allow(self, key, cost=1):
+        """Take ``cost`` tokens from key's bucket; False if it doesn't have them"""
+        now = self.clock()
+        self._evict(now)
+        bucket = self._bucket(key, now)
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            self.allowed += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def retry_after(self, key, cost=1):
+        """Seconds until key's bucket holds ``cost`` tokens again"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return 0.0
+        tokens = min(self.burst, bucket[0] + (self.clock() - bucket[1]) * self.rate)
+        return max(0.0, (cost - tokens) / self.rate)
+
+    def stats(self):
+        """Limiter metrics"""
+        return {
+            'buckets': len(self._buckets),
+            'allowed': self.allowed,
+            'rejected': self.rejected,
+            'evicted': self.evicted
+        }
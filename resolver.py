@@ -0,0 +1,193 @@
+"""Per-guild cache of where the bot's channels and messages live.
+
+Finding the #keys channel used to scan every guild channel, and finding the
+ledger message paged through the channel history on every button click.
+GuildResolver remembers the IDs once found (including one message per ledger
+shard), persists them in the key store so they survive restarts, and hands
+out partial messages so that a hot path costs no API calls at all. Cached
+IDs are dropped when the channel or message is deleted.
+"""
+import re
+
+import discord
+
+KEYS_CHANNEL = 'keys'
+CUSTOMER_CHANNEL = 'customer'
+
+# Which cached message lives in which cached channel
+MESSAGE_CHANNELS = {
+    'customer_message_id': 'customer_channel_id'
+}
+
+
+# Title of every ledger message after the first
+LEDGER_PAGE_TITLE = re.compile(r'Generated Keys \(page (\d+)\)')
+
+
+def is_keys_message(message):
+    return bool(message.embeds) and message.embeds[0].title == "Generated Keys"
+
+
+def ledger_shard(message):
+    """The ledger shard a message renders, or None if it isn't a ledger message"""
+    if is_keys_message(message):
+        return 0
+    match = LEDGER_PAGE_TITLE.fullmatch(message.embeds[0].title or '') if message.embeds else None
+    return int(match.group(1)) - 1 if match else None
+
+
+def is_customer_message(message):
+    return bool(message.embeds) and bool(message.embeds[0].fields) and message.embeds[0].fields[0].name == "**Fetch Key**"
+
+
+class GuildResolver:
+    """Resolves and caches each guild's keys/customer channels and messages"""
+
+    def __init__(self, store):
+        self.store = store
+        self._locations = {}  # guild_id -> {column: id}
+        self._ledger_messages = {}  # guild_id -> {shard: message_id}
+        self.hits = 0
+        self.misses = 0
+
+    async def load(self):
+        """Load every guild's persisted locations from the store"""
+        self._locations = await self.store.get_guild_locations()
+        self._ledger_messages = await self.store.get_ledger_messages()
+
+    async def remember(self, guild_id, **ids):
+        """Cache and persist channel/message IDs for a guild"""
+        self._locations.setdefault(guild_id, {}).update(ids)
+        await self.store.set_guild_locations(guild_id, **ids)
+
+    async def remember_ledger_message(self, guild_id, shard, message_id):
+        """Cache and persist the message that renders a ledger shard"""
+        self._ledger_messages.setdefault(guild_id, {})[shard] = message_id
+        await self.store.set_ledger_message(guild_id, shard, message_id)
+
+    def ledger_shards(self, guild_id):
+        """Shards that already have a ledger message"""
+        return set(self._ledger_messages.get(guild_id, {}))
+
+    def ledger_messages(self, guild_id):
+        """{shard: message ID} of the guild's ledger messages"""
+        return dict(self._ledger_messages.get(guild_id, {}))
+
+    async def _forget(self, guild_id, columns):
+        location = self._locations.get(guild_id, {})
+        stale = {column: None for column in columns if location.get(column) is not None}
+        if stale:
+            await self.remember(guild_id, **stale)
+
+    # -- channels ---------------------------------------------------------
+
+    async def _channel(self, guild, column, name):
+        channel_id = self._locations.get(guild.id, {}).get(column)
+        if channel_id:
+            channel = guild.get_channel(channel_id)
+            if isinstance(channel, discord.TextChannel):
+                self.hits += 1
+                return channel
+
+        # Slow path: scan the guild's channels once, then remember the result
+        self.misses += 1
+        for channel in guild.channels:
+            if channel.name.lower() == name and isinstance(channel, discord.TextChannel):
+                await self.remember(guild.id, **{column: channel.id})
+                return channel
+        return None
+
+    async def keys_channel(self, guild):
+        """The guild's #keys channel, or None"""
+        return await self._channel(guild, 'keys_channel_id', KEYS_CHANNEL)
+
+    async def customer_channel(self, guild):
+        """The guild's #customer channel, or None"""
+        return await self._channel(guild, 'customer_channel_id', CUSTOMER_CHANNEL)
+
+    # -- messages ---------------------------------------------------------
+
+    async def _message(self, channel, column, predicate, limit):
+        message_id = self._locations.get(channel.guild.id, {}).get(column)
+        if message_id:
+            # No fetch needed: a partial message is enough to edit it
+            self.hits += 1
+            return channel.get_partial_message(message_id)
+
+        # Slow path: search the channel history once, then remember the result
+        self.misses += 1
+        async for message in channel.history(limit=limit):
+            if predicate(message):
+                await self.remember(channel.guild.id, **{column: message.id})
+                return message
+        return None
+
+    async def keys_message(self, channel, shard=0):
+        """The ledger message for one shard in the keys channel, or None"""
+        message_id = self._ledger_messages.get(channel.guild.id, {}).get(shard)
+        if message_id:
+            self.hits += 1
+            return channel.get_partial_message(message_id)
+
+        self.misses += 1
+        if shard != 0:
+            # Only the first page carries the plain "Generated Keys" title
+            return None
+        # The first page is the oldest ledger message, so a newest-first scan with a limit misses it behind a big ledger
+        async for message in channel.history(limit=None, oldest_first=True):
+            if is_keys_message(message):
+                await self.remember_ledger_message(channel.guild.id, shard, message.id)
+                return message
+        return None
+
+    async def ledger_pages(self, channel):
+        """{shard: message} for every ledger message in the keys channel; reads the whole history"""
+        self.misses += 1
+        pages = {}
+        async for message in channel.history(limit=None, oldest_first=True):
+            shard = ledger_shard(message)
+            if shard is not None:
+                pages.setdefault(shard, message)
+        return pages
+
+    async def customer_message(self, channel):
+        """The customer support panel message in the customer channel, or None"""
+        return await self._message(channel, 'customer_message_id', is_customer_message, 10)
+
+    # -- invalidation -----------------------------------------------------
+
+    async def forget_channel(self, channel):
+        """Drop a deleted channel and the messages cached in it"""
+        location = self._locations.get(channel.guild.id, {})
+        columns = []
+        if location.get('keys_channel_id') == channel.id:
+            columns.append('keys_channel_id')
+            for shard in self.ledger_shards(channel.guild.id):
+                await self._forget_ledger_message(channel.guild.id, shard)
+        for message_column, channel_column in MESSAGE_CHANNELS.items():
+            if location.get(channel_column) == channel.id:
+                columns += [channel_column, message_column]
+        await self._forget(channel.guild.id, columns)
+
+    async def forget_message(self, guild_id, message_id):
+        """Drop a deleted message"""
+        for shard, shard_message_id in list(self._ledger_messages.get(guild_id, {}).items()):
+            if shard_message_id == message_id:
+                await self._forget_ledger_message(guild_id, shard)
+        location = self._locations.get(guild_id, {})
+        columns = [column for column in MESSAGE_CHANNELS if location.get(column) == message_id]
+        await self._forget(guild_id, columns)
+
+    async def _forget_ledger_message(self, guild_id, shard):
+        self._ledger_messages.get(guild_id, {}).pop(shard, None)
+        await self.store.set_ledger_message(guild_id, shard, None)
+
+    def stats(self):
+        """Cache metrics"""
+        lookups = self.hits + self.misses
+        return {
+            'guilds': len(self._locations),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
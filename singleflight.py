@@ -0,0 +1,67 @@
+"""Single-flight loading.
+
+When a burst of interactions needs the same guild's data at once, only the
+first caller runs the load; everyone else awaits that same task instead of
+repeating its API calls. The result is cached, so later callers don't load
+again.
+"""
+import asyncio
+
+
+class SingleFlight:
+    """Shares one in-flight load per key and caches its result"""
+
+    def __init__(self):
+        self._results = {}  # key -> loaded value
+        self._inflight = {}  # key -> task running the load
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0  # Callers that joined a load already in flight
+        self.saved_api_calls = 0
+
+    async def load(self, key, loader):
+        """Return the cached value for key, or run ``loader()`` once for all concurrent callers
+
+        ``loader`` is an async callable returning ``(value, api_calls)``; the
+        call count is what every caller that joins the load avoids repeating.
+        """
+        if key in self._results:
+            self.hits += 1
+            return self._results[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.create_task(self._run(key, loader))
+            self._inflight[key] = task
+            joined = False
+        else:
+            self.shared += 1
+            joined = True
+
+        # Shielded so a cancelled caller doesn't cancel the load for the others
+        value, api_calls = await asyncio.shield(task)
+        if joined:
+            self.saved_api_calls += api_calls
+        return value
+
+    async def _run(self, key, loader):
+        try:
+            value, api_calls = await loader()
+            self._results[key] = value
+            return value, api_calls
+        finally:
+            # On failure nothing is cached and the next caller retries
+            del self._inflight[key]
+
+    def stats(self):
+        """Cache metrics"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'shared': self.shared,
+            'saved_api_calls': self.saved_api_calls,
+            'inflight': len(self._inflight)
+        }
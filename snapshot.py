@@ -0,0 +1,113 @@
+"""Machine-readable ledger snapshots.
+
+The ledger embeds are a view for humans: expired keys lose their expiry,
+field values are capped by Discord, and every shard is a separate message,
+so reading keys back out of them is slow and lossy. Railway's disk doesn't
+survive a redeploy, though, and the ledger in Discord is the only copy of
+the keys that does. So a snapshot of the guild's whole key set is attached
+to the first ledger message, refreshed a while after the ledger changes
+rather than on every edit: gzip-compressed NDJSON, a header line followed
+by one JSON array per key. SnapshotDecoder reads it back incrementally as
+the download arrives, so restoring any number of keys takes one fetch and
+never holds the whole decompressed file in memory.
+"""
+import gzip
+import json
+import zlib
+
+import aiohttp
+
+from keyrecord import KeyRecord, KeyStatus
+
+SNAPSHOT_FILENAME = 'keys-snapshot.ndjson.gz'
+FORMAT = 'keys-snapshot'
+VERSION = 1
+
+# Per-key fields in the snapshot; the guild is implied and versions restart at 0
+SNAPSHOT_COLUMNS = ('key', 'user_id', 'status', 'duration', 'created_at', 'expires_at', 'hwid', 'shard')
+
+
+def encode_snapshot(guild_id, records, ledger_messages):
+    """Compressed snapshot of a guild's KeyRecords and its {shard: ledger message ID}"""
+    dumps = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+    header = {
+        'format': FORMAT,
+        'version': VERSION,
+        'guild_id': guild_id,
+        'keys': len(records),
+        'columns': SNAPSHOT_COLUMNS,
+        'ledger_messages': {str(shard): message_id for shard, message_id in ledger_messages.items()}
+    }
+    lines = [dumps(header)]
+    for record in sorted(records, key=lambda record: (record.shard, record.key)):
+        lines.append(dumps([
+            record.key, record.user_id, int(record.status), record.duration,
+            record.created_at, record.expires_at, record.hwid, record.shard
+        ]))
+    lines.append('')
+    return gzip.compress('\n'.join(lines).encode(), compresslevel=6, mtime=0)
+
+
+class SnapshotDecoder:
+    """Incremental decoder: feed() compressed chunks, get KeyRecords for the complete lines back"""
+
+    def __init__(self, guild_id):
+        self.guild_id = guild_id
+        self.header = None
+        self.decoded = 0
+        self._inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)  # gzip container
+        self._buffer = b''
+        self._columns = None  # Index of each SNAPSHOT_COLUMNS entry in the file's rows
+
+    def feed(self, chunk):
+        """Decode the next chunk of the file"""
+        return self._decode(self._inflate.decompress(chunk))
+
+    def close(self):
+        """Decode what is left; raises ValueError if the file was cut short"""
+        records = self._decode(self._inflate.flush())
+        if not self._inflate.eof or self._buffer:
+            raise ValueError("Snapshot is truncated")
+        if self.header is None or self.decoded != self.header['keys']:
+            raise ValueError("Snapshot is missing keys")
+        return records
+
+    def _decode(self, data):
+        lines = (self._buffer + data).split(b'\n')
+        self._buffer = lines.pop()
+        return [record for record in map(self._line, lines) if record is not None]
+
+    def _line(self, line):
+        if not line:
+            return None
+        row = json.loads(line)
+        if self.header is None:
+            if not isinstance(row, dict) or row.get('format') != FORMAT or row.get('version') != VERSION:
+                raise ValueError("Not a supported key snapshot")
+            self.header = row
+            self._columns = [row['columns'].index(column) for column in SNAPSHOT_COLUMNS]
+            return None
+        key, user_id, status, duration, created_at, expires_at, hwid, shard = [row[i] for i in self._columns]
+        self.decoded += 1
+        return KeyRecord(
+            key, self.guild_id, user_id, KeyStatus(status), duration, created_at, expires_at, hwid, shard
+        )
+
+    def ledger_messages(self):
+        """{shard: message ID} recorded in the header"""
+        return {int(shard): message_id for shard, message_id in self.header.get('ledger_messages', {}).items()}
+
+
+async def fetch_snapshot(url, guild_id, chunk_size=1 << 16, timeout=60, trace_configs=()):
+    """Download and decode a snapshot in one streamed request; returns (decoder, records)"""
+    decoder = SnapshotDecoder(guild_id)
+    records = []
+    async with aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=timeout), trace_configs=list(trace_configs)
+    ) as session:
+        async with session.get(url) as response:
+            response.raise_for_status()
+            async for chunk in response.content.iter_chunked(chunk_size):
+                records += decoder.feed(chunk)
+    records += decoder.close()
+    return decoder, records
@@ -0,0 +1,68 @@
+"""Per-guild read-modify-write transactions over the key store.
+
+A command that checks a key and then changes it used to read, await, and
+write with nothing in between to stop another writer (a second click, the
+expiry sweeper) from changing the key first. A KeyTransaction records the
+version of every key it reads and buffers its writes. On commit the store
+re-checks those versions and applies all writes in one SQLite transaction,
+or raises KeyConflict so the transaction function can run again on fresh
+data. Plain reads never take part and stay lock-free.
+"""
+
+
+class KeyConflict(Exception):
+    """A key read by a transaction was changed before the transaction committed"""
+
+    def __init__(self, key, record):
+        super().__init__(f"Key {key} was modified concurrently")
+        self.key = key
+        self.record = record  # The key's current KeyRecord, or None if it was deleted
+
+
+class KeyTransaction:
+    """Reads and buffered writes against one guild's keys
+
+    Reads see the state before the transaction; a transaction doesn't see its
+    own writes. New keys added for a user are not tracked by user_keys().
+    """
+
+    def __init__(self, index, guild_id):
+        self.index = index
+        self.guild_id = guild_id
+        self.reads = {}  # key -> version read, None if the key didn't exist
+        self.adds = []  # KeyRecords to insert
+        self.updates = {}  # key -> {column: value}
+        self.deletes = []  # keys to delete
+
+        # Filled in on commit
+        self.result = None
+        self.shards = set()
+
+    def get(self, key):
+        """A key's KeyRecord, or None"""
+        record = self.index.get(self.guild_id, key)
+        self.reads.setdefault(key, record.version if record is not None else None)
+        return record
+
+    def user_keys(self, user_id):
+        """A user's keys as {key: KeyRecord}"""
+        keys = self.index.user_keys(self.guild_id, user_id)
+        for key, record in keys.items():
+            self.reads.setdefault(key, record.version)
+        return keys
+
+    def add(self, record):
+        """Insert a new key"""
+        self.adds.append(record)
+
+    def update(self, key, **fields):
+        """Change some columns of a key"""
+        self.updates.setdefault(key, {}).update(fields)
+
+    def delete(self, key):
+        """Delete a key"""
+        self.deletes.append(key)
+
+    @property
+    def writes(self):
+        return bool(self.adds or self.updates or self.deletes)
@@ -0,0 +1,55 @@
+"""Key validation for the login client.
+
+The login client used to read the "Generated Keys" embed through Discord to
+check a key. validate() answers the same question from the in-memory key
+index in O(1) without any I/O; only a key's first use, which binds it to the
+caller's HWID, needs a store write. Keys that fail the key format's check are
+turned away before the index is touched.
+"""
+from keyrecord import KeyStatus
+
+# Longest HWID that gets bound; it is rendered into the ledger, whose fields Discord caps at 1024 characters
+MAX_HWID_LENGTH = 128
+
+
+def _body(valid, record, error=None, status=None):
+    body = {
+        'valid': valid,
+        'status': (status if status is not None else record.status).label.lower(),
+        'expires_at': record.expires_at
+    }
+    if error:
+        body['error'] = error
+    return body
+
+
+def validate(index, key_format, key, hwid, now):
+    """Check key + HWID at epoch time ``now``
+
+    Returns (HTTP status, JSON body), or None if the key has no HWID yet and
+    has to be bound with bind_hwid() first.
+    """
+    if not isinstance(key, str) or not isinstance(hwid, str) or not key or not hwid:
+        return 400, {'valid': False, 'error': 'missing_parameters'}
+    if len(hwid) > MAX_HWID_LENGTH:
+        return 400, {'valid': False, 'error': 'invalid_hwid'}
+    if not key_format.is_well_formed(key):
+        return 400, {'valid': False, 'error': 'malformed_key'}
+    record = index.find(key)
+    if record is None:
+        return 404, {'valid': False, 'error': 'invalid_key'}
+    # The sweeper may not have flagged a key that is already due
+    if record.expired or record.is_due(now):
+        return 403, _body(False, record, 'expired', KeyStatus.EXPIRED)
+    if record.hwid is None:
+        return None
+    if record.hwid != hwid:
+        return 403, _body(False, record, 'hwid_mismatch')
+    return 200, _body(True, record)
+
+
+def bind_hwid(txn, key, hwid):
+    """Transaction function binding an unbound key to a HWID on first use"""
+    record = txn.get(key)
+    if record is not None and record.hwid is None and not record.expired:
+        txn.update(key, status=KeyStatus.USED, hwid=hwid)
@@ -0,0 +1,54 @@
+"""HTTP server running inside the bot's event loop.
+
+The web side used to be Flask's development server in the main thread with
+the bot in a daemon thread, so the two shared nothing and /health could not
+see the gateway. WebServer runs an aiohttp application on the bot's own
+loop: handlers read the key index and bot state directly, without locks or
+cross-thread hops, and the bot supervises the server's lifecycle.
+"""
+from aiohttp import web
+
+
+class WebServer:
+    """aiohttp server started and stopped together with the bot"""
+
+    def __init__(self, routes, host='0.0.0.0', port=8080, middlewares=()):
+        self.routes = routes
+        self.middlewares = list(middlewares)
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def start(self):
+        """Start serving (call from inside the event loop)"""
+        if self._runner is not None:
+            return
+        app = web.Application(middlewares=self.middlewares)
+        app.add_routes(self.routes)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, self.host, self.port).start()
+        self._runner = runner
+        print(f"HTTP server listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        """Stop accepting requests and close open connections"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def request_params(request):
+    """Query parameters merged with a JSON object or form body"""
+    params = dict(request.query)
+    if request.can_read_body:
+        if request.content_type == 'application/json':
+            try:
+                body = await request.json()
+            except ValueError:
+                body = None
+            if isinstance(body, dict):
+                params.update(body)
+        else:
+            params.update(await request.post())
+    return params